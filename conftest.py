@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def discard_counters(django_db_setup):
+    """Отбрасывает приращения счётчиков, засчитанные в тестах.
+
+    После удаления тестовой базы atexit записал бы их в рабочую.
+    """
+    yield
+    from posts.counters import discard_all
+    discard_all()
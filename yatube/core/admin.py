@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'dedup_key',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('dedup_key',)
+
+
+admin.site.register(Job, JobAdmin)
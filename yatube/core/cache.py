@@ -0,0 +1,458 @@
+import atexit
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LOCAL_MAX_ENTRIES: int = 1000
+LOCAL_MAX_BYTES: int = 8 * 1024 * 1024
+CHANGES_KEPT: int = 10000
+CULL_EVERY: int = 100
+BUSY_TIMEOUT: float = 5.0
+FILE_MODE: int = 0o600
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entries ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE TABLE IF NOT EXISTS cache_changes ('
+    'seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)',
+)
+
+
+@lru_cache(maxsize=None)
+def private_location(pid):
+    """Временный файл кэша процесса; Django создаёт кэш на каждый поток."""
+    directory = tempfile.mkdtemp(prefix='yatube-cache-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return os.path.join(directory, 'cache.sqlite3')
+
+
+class LocalTier:
+    """LRU в памяти процесса с ограничением по числу записей и байтам.
+
+    Хранит значения в pickle, как LocMemCache: get отдаёт копию, и
+    изменение полученного объекта не портит кэш.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= now:
+            self.discard(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, expires):
+        self.discard(key)
+        if len(value) > self.max_bytes // 8:
+            return
+        self.entries[key] = (value, expires)
+        self.size += len(value)
+        while (
+            len(self.entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+class ProcessTier:
+    """Локальный уровень процесса и его позиция в журнале изменений.
+
+    Django создаёт экземпляр кэша на каждый поток, поэтому состояние
+    живёт не в экземпляре, а в PROCESS_TIERS: потоки одного процесса
+    делят один LRU и один бюджет LOCAL_MAX_ENTRIES, а доступ к нему
+    идёт под lock.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.local = LocalTier(max_entries, max_bytes)
+        self.lock = threading.RLock()
+        self.last_seq = None
+        self.own_changes = {}
+        self.writes = 0
+
+
+PROCESS_TIERS = {}
+PROCESS_TIERS_LOCK = threading.Lock()
+
+
+def process_tier(path, max_entries, max_bytes):
+    """Общий для потоков процесса уровень файла path.
+
+    Ключ включает pid: после fork дочерний процесс получает свой
+    пустой уровень, а не копию родительского.
+    """
+    key = (path, os.getpid())
+    with PROCESS_TIERS_LOCK:
+        if key not in PROCESS_TIERS:
+            PROCESS_TIERS[key] = ProcessTier(max_entries, max_bytes)
+        return PROCESS_TIERS[key]
+
+
+class TwoTierCache(BaseCache):
+    """Кэш из двух уровней: LRU процесса перед общим файлом SQLite.
+
+    Общий уровень — файл LOCATION, который читают все воркеры хоста;
+    запись идёт в него сразу (write-through) и в локальный уровень
+    своего процесса. Каждая запись добавляет ключ в журнал изменений
+    cache_changes. Перед чтением процесс сверяет PRAGMA data_version
+    своего соединения — он меняется, только если файл изменило другое
+    соединение, — и лишь тогда вычитывает новые ключи журнала и
+    выбрасывает их из локального уровня. Если журнал успел обрезаться
+    дальше, чем процесс прочитал, локальный уровень очищается целиком.
+
+    Django создаёт экземпляр кэша на каждый поток, но локальный уровень
+    у экземпляров одного процесса общий (ProcessTier), так что
+    LOCAL_MAX_ENTRIES и LOCAL_MAX_BYTES — бюджет процесса, а не потока.
+    Соединения с файлом у потоков свои.
+
+    Значения хранятся в pickle, поэтому файл создаётся с правами 0600:
+    читать и подменять его может только владелец процесса. SQLite
+    создаёт файлы -wal и -shm с теми же правами.
+
+    Пустой LOCATION — свой временный файл процесса, удаляемый при
+    выходе: для тестов, которым не нужны данные прошлых запусков.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location or private_location(os.getpid())
+        self.local_sizes = (
+            int(options.get('LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES)),
+            int(options.get('LOCAL_MAX_BYTES', LOCAL_MAX_BYTES)),
+        )
+        self.tier = process_tier(self.path, *self.local_sizes)
+        self.tier_pid = os.getpid()
+        self.connections = threading.local()
+
+    def connection(self):
+        state = self.connections
+        if getattr(state, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, FILE_MODE))
+            connection = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            state.connection = connection
+            state.pid = os.getpid()
+            state.data_version = None
+            if self.tier_pid != os.getpid():
+                self.tier = process_tier(self.path, *self.local_sizes)
+                self.tier_pid = os.getpid()
+            with self.tier.lock:
+                if self.tier.last_seq is None:
+                    self.tier.last_seq = self.max_seq(connection)
+        return state.connection
+
+    @staticmethod
+    def max_seq(connection):
+        return connection.execute(
+            'SELECT COALESCE(MAX(seq), 0) FROM cache_changes'
+        ).fetchone()[0]
+
+    def sync(self, connection):
+        """Выбрасывает из локального уровня ключи, изменённые другими."""
+        state = self.connections
+        version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if version == state.data_version:
+            return
+        state.data_version = version
+        with self.tier.lock:
+            rows = connection.execute(
+                'SELECT seq, key FROM cache_changes WHERE seq > ? '
+                'ORDER BY seq', (self.tier.last_seq,)
+            ).fetchall()
+            if not rows:
+                return
+            if rows[0][0] > self.tier.last_seq + 1:
+                self.tier.local.clear()
+            for seq, key in rows:
+                if self.tier.own_changes.pop(key, None) == seq:
+                    continue
+                if key is None:
+                    self.tier.local.clear()
+                else:
+                    self.tier.local.discard(key)
+            self.tier.last_seq = rows[-1][0]
+
+    def write(self, statements):
+        """Выполняет изменения одной транзакцией и пишет их в журнал.
+
+        statements — пары (ключ, [(sql, параметры), ...]); ключ None
+        означает все ключи. Возвращает результаты последних запросов
+        для каждого ключа.
+        """
+        connection = self.connection()
+        self.sync(connection)
+        results = []
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            changed = []
+            for key, queries in statements:
+                cursor = None
+                for sql, params in queries:
+                    cursor = connection.execute(sql, params)
+                results.append(cursor)
+                if cursor is not None and cursor.rowcount == 0:
+                    continue
+                seq = connection.execute(
+                    'INSERT INTO cache_changes (key) VALUES (?)', (key,)
+                ).lastrowid
+                changed.append((key, seq))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        with self.tier.lock:
+            for key, seq in changed:
+                self.tier.own_changes[key] = seq
+            self.tier.writes += 1
+            due = self.tier.writes % CULL_EVERY == 0
+        if due:
+            self.cull(connection)
+        return results
+
+    def cull(self, connection):
+        """Ограничивает общий файл числом записей и длиной журнала.
+
+        Вытесняются только записи со сроком: бессрочные — счётчики и
+        версии — пропали бы молча, и их отсчёт начался бы заново.
+        """
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM cache_entries WHERE expires <= ?', (now,)
+            )
+            count = connection.execute(
+                'SELECT COUNT(*) FROM cache_entries'
+            ).fetchone()[0]
+            if count > self._max_entries:
+                connection.execute(
+                    'DELETE FROM cache_entries WHERE rowid IN ('
+                    'SELECT rowid FROM cache_entries '
+                    'WHERE expires IS NOT NULL ORDER BY rowid LIMIT ?)', (
+                        count - self._max_entries
+                        + self._max_entries // self._cull_frequency,
+                    )
+                )
+            connection.execute(
+                'DELETE FROM cache_changes WHERE seq <= ('
+                'SELECT MAX(seq) FROM cache_changes) - ?', (CHANGES_KEPT,)
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        with self.tier.lock:
+            self.tier.local.clear()
+            self.tier.own_changes.clear()
+
+    def expiry(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        if expires is not None and expires <= time.time():
+            return time.time() - 1
+        return expires
+
+    def remember(self, key, value, expires, seen):
+        """Кладёт прочитанное значение в локальный уровень.
+
+        Если за время чтения журнал продвинулся, значение могло
+        устареть, и оно не кэшируется.
+        """
+        with self.tier.lock:
+            if self.tier.last_seq == seen:
+                self.tier.local.put(key, value, expires)
+
+    def fetch(self, keys):
+        connection = self.connection()
+        self.sync(connection)
+        now = time.time()
+        found = {}
+        missing = []
+        with self.tier.lock:
+            seen = self.tier.last_seq
+            for key in keys:
+                value = self.tier.local.get(key, now)
+                if value is None:
+                    missing.append(key)
+                else:
+                    found[key] = value
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = connection.execute(
+                'SELECT key, value, expires FROM cache_entries '
+                'WHERE key IN ({}) AND (expires IS NULL OR expires > ?)'
+                .format(','.join('?' * len(chunk))),
+                (*chunk, now)
+            ).fetchall()
+            for key, value, expires in rows:
+                found[key] = bytes(value)
+                self.remember(key, bytes(value), expires, seen)
+        return found
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.expiry(timeout)
+        cursor, = self.write([(key, [
+            ('DELETE FROM cache_entries WHERE key = ? AND expires <= ?',
+             (key, time.time())),
+            ('INSERT OR IGNORE INTO cache_entries VALUES (?, ?, ?)',
+             (key, data, expires)),
+        ])])
+        if cursor.rowcount:
+            with self.tier.lock:
+                self.tier.local.put(key, data, expires)
+        return bool(cursor.rowcount)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self.fetch([key]).get(key)
+        if data is None:
+            return default
+        return pickle.loads(data)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        return {
+            made[key]: pickle.loads(data)
+            for key, data in self.fetch(list(made)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.expiry(timeout)
+        values = {}
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            values[key] = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if not values:
+            return []
+        self.write([
+            (key, [(
+                'INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)',
+                (key, value, expires)
+            )])
+            for key, value in values.items()
+        ])
+        with self.tier.lock:
+            for key, value in values.items():
+                self.tier.local.put(key, value, expires)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expires = self.expiry(timeout)
+        cursor, = self.write([(key, [(
+            'UPDATE cache_entries SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (expires, key, time.time())
+        )])])
+        with self.tier.lock:
+            self.tier.local.discard(key)
+        return bool(cursor.rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарное приращение: чтение и запись в одной транзакции."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self.connection()
+        self.sync(connection)
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value, expires FROM cache_entries WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)', (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?',
+                (data, key)
+            )
+            seq = connection.execute(
+                'INSERT INTO cache_changes (key) VALUES (?)', (key,)
+            ).lastrowid
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        with self.tier.lock:
+            self.tier.own_changes[key] = seq
+            self.tier.local.put(key, data, row[1])
+        return value
+
+    def delete(self, key, version=None):
+        return bool(self.delete_many([key], version))
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        if not keys:
+            return 0
+        cursors = self.write([
+            (key, [('DELETE FROM cache_entries WHERE key = ?', (key,))])
+            for key in keys
+        ])
+        with self.tier.lock:
+            for key in keys:
+                self.tier.local.discard(key)
+        return sum(cursor.rowcount for cursor in cursors)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key in self.fetch([key])
+
+    def clear(self):
+        self.write([(None, [('DELETE FROM cache_entries', ())])])
+        with self.tier.lock:
+            self.tier.local.clear()
+
+    def close(self, **kwargs):
+        """Соединения с файлом живут весь процесс, как у LocMemCache."""
@@ -0,0 +1,187 @@
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connections
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+VISIBILITY_TIMEOUT: int = 300
+POLL_INTERVAL: float = 1.0
+BACKOFF_BASE: int = 2
+BACKOFF_MAX: int = 3600
+CLAIM_BATCH: int = 20
+
+TASKS = {}
+
+
+def task(name, max_attempts=5):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def save_job(job):
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        pass
+
+
+def enqueue(name, payload=None, dedup_key=None, delay=0):
+    """Ставит задачу в очередь после коммита текущей транзакции.
+
+    Задача ссылается на строки, записанные вызывающим кодом: при
+    откате транзакции она не появится, и воркер не заберёт её раньше,
+    чем эти строки станут видны. Вне транзакции задача пишется сразу
+    и возвращается; внутри транзакции, а также если в очереди уже
+    ждёт задача с тем же dedup_key, возвращается None. При JOBS_EAGER
+    задача выполняется сразу после коммита, а отложенная пропускается
+    — иначе периодические задачи, ставящие себя в очередь заново,
+    зациклились бы.
+    """
+    func, max_attempts = TASKS[name]
+    payload = payload or {}
+    if getattr(settings, 'JOBS_EAGER', False):
+        if not delay:
+            transaction.on_commit(partial(func, **payload))
+        return None
+    job = Job(
+        name=name,
+        payload=json.dumps(payload),
+        dedup_key=dedup_key,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    transaction.on_commit(partial(save_job, job))
+    return job if job.pk else None
+
+
+def claim(visibility_timeout=VISIBILITY_TIMEOUT):
+    """Забирает готовую к выполнению задачу.
+
+    Задача, воркер которой не уложился в visibility_timeout, снова
+    становится доступной. Захват — условный UPDATE, поэтому два воркера
+    не получат одну задачу.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    ).order_by('run_at').values_list(
+        'id', 'status', 'locked_until'
+    )[:CLAIM_BATCH]
+    for pk, status, locked_until in candidates:
+        claimed = Job.objects.filter(
+            pk=pk, status=status, locked_until=locked_until
+        ).update(
+            status=Job.RUNNING,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+            updated=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE ** attempts, BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def retry(job, error):
+    if job.attempts >= job.max_attempts:
+        status, run_at = Job.FAILED, job.run_at
+    else:
+        status = Job.QUEUED
+        run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk, attempts=job.attempts).update(
+                status=status,
+                run_at=run_at,
+                locked_until=None,
+                last_error=error,
+                updated=timezone.now(),
+            )
+    except IntegrityError:
+        # В очереди уже есть такая же задача, она и сделает работу.
+        Job.objects.filter(pk=job.pk, attempts=job.attempts).update(
+            status=Job.DONE,
+            locked_until=None,
+            last_error=error,
+            updated=timezone.now(),
+        )
+
+
+def run_job(job):
+    try:
+        func, _ = TASKS[job.name]
+        func(**json.loads(job.payload))
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', job)
+        retry(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk, attempts=job.attempts).update(
+        status=Job.DONE,
+        locked_until=None,
+        last_error='',
+        updated=timezone.now(),
+    )
+    return True
+
+
+def run_pending(visibility_timeout=VISIBILITY_TIMEOUT):
+    """Выполняет все готовые задачи в текущем процессе."""
+    processed = 0
+    job = claim(visibility_timeout)
+    while job is not None:
+        run_job(job)
+        processed += 1
+        job = claim(visibility_timeout)
+    return processed
+
+
+def work(once=False, poll_interval=POLL_INTERVAL,
+         visibility_timeout=VISIBILITY_TIMEOUT):
+    """Цикл воркера: выполняет задачи, пока они есть или до Ctrl+C."""
+    processed = 0
+    try:
+        while True:
+            try:
+                job = claim(visibility_timeout)
+            except OperationalError:
+                time.sleep(poll_interval)
+                continue
+            if job is not None:
+                run_job(job)
+                processed += 1
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+    return processed
+
+
+def purge_finished(days):
+    return Job.objects.filter(
+        status=Job.DONE, updated__lt=timezone.now() - timedelta(days=days)
+    ).delete()[0]
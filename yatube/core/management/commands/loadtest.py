@@ -0,0 +1,300 @@
+import io
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, login
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connections
+from django.http import HttpRequest
+from django.utils.crypto import get_random_string
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+DEFAULT_MIX = 'browse=60,feed=15,post=5,comment=10,follow=10'
+LOADTEST_USER_PREFIX = 'loadtest_'
+SAMPLE_LIMIT = 1000
+PERCENTILES = (50, 90, 95, 99)
+SQLITE_LOCKED = 'sqlite_locked'
+
+_local = threading.local()
+
+
+def browse(rng, context):
+    choice = rng.random()
+    if choice < 0.4 or not context['post_ids']:
+        return 'GET', '/', {'page': rng.randint(1, 5)}, None
+    if choice < 0.6 and context['group_slugs']:
+        slug = rng.choice(context['group_slugs'])
+        return 'GET', f'/group/{slug}/', {}, None
+    if choice < 0.8:
+        username = rng.choice(context['usernames'])
+        return 'GET', f'/profile/{username}/', {}, None
+    post_id = rng.choice(context['post_ids'])
+    return 'GET', f'/posts/{post_id}/', {}, None
+
+
+def feed(rng, context):
+    user = rng.randrange(len(context['sessions']))
+    return 'GET', '/follow/', {'page': rng.randint(1, 3)}, user
+
+
+def create_post(rng, context):
+    user = rng.randrange(len(context['sessions']))
+    data = {'text': f'Нагрузочный пост {rng.getrandbits(32)}'}
+    if context['group_ids'] and rng.random() < 0.5:
+        data['group'] = rng.choice(context['group_ids'])
+    return 'POST', '/create/', data, user
+
+
+def add_comment(rng, context):
+    if not context['post_ids']:
+        return create_post(rng, context)
+    user = rng.randrange(len(context['sessions']))
+    post_id = rng.choice(context['post_ids'])
+    data = {'text': f'Нагрузочный комментарий {rng.getrandbits(32)}'}
+    return 'POST', f'/posts/{post_id}/comment/', data, user
+
+
+def toggle_follow(rng, context):
+    user = rng.randrange(len(context['sessions']))
+    username = rng.choice(context['usernames'])
+    action = rng.choice(('follow', 'unfollow'))
+    return 'GET', f'/profile/{username}/{action}/', {}, user
+
+
+SCENARIOS = {
+    'browse': browse,
+    'feed': feed,
+    'post': create_post,
+    'comment': add_comment,
+    'follow': toggle_follow,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f'Неизвестный сценарий: {name}')
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise CommandError(f'Некорректный вес сценария {name}: {weight}')
+    if not any(mix.values()):
+        raise CommandError('Хотя бы один сценарий должен иметь вес больше 0')
+    return mix
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    index = int(round(percent / 100 * (len(values) - 1)))
+    return values[min(index, len(values) - 1)]
+
+
+def classify_error(error):
+    if error is None:
+        return None
+    if isinstance(error, OperationalError) and 'locked' in str(error):
+        return SQLITE_LOCKED
+    return type(error).__name__
+
+
+def record_exception(sender, **kwargs):
+    _local.error = sys.exc_info()[1]
+
+
+def build_environ(method, path, data, session_key, csrf_token):
+    query, body = '', b''
+    if method == 'GET':
+        query = urlencode(data)
+    else:
+        body = urlencode(data).encode()
+    cookies = [f'{settings.CSRF_COOKIE_NAME}={csrf_token}']
+    if session_key:
+        cookies.append(f'{settings.SESSION_COOKIE_NAME}={session_key}')
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': '; '.join(cookies),
+        'HTTP_X_CSRFTOKEN': csrf_token,
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def perform(application, environ):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    _local.error = None
+    started = time.perf_counter()
+    result = application(environ, start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0], time.perf_counter() - started, _local.error
+
+
+def run_worker(job):
+    """Выполняет серию запросов одного воркера и возвращает замеры."""
+    from yatube.wsgi import application
+
+    worker_seed, count, mix, context = job
+    got_request_exception.connect(record_exception, dispatch_uid='loadtest')
+    rng = random.Random(worker_seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = []
+    for _ in range(count):
+        name = rng.choices(names, weights)[0]
+        method, path, data, user = SCENARIOS[name](rng, context)
+        session_key = None if user is None else context['sessions'][user]
+        environ = build_environ(
+            method, path, data, session_key, context['csrf_token']
+        )
+        status, latency, error = perform(application, environ)
+        samples.append((name, status, latency, classify_error(error)))
+    connections.close_all()
+    return samples
+
+
+def open_session(user):
+    engine = import_module(settings.SESSION_ENGINE)
+    request = HttpRequest()
+    request.session = engine.SessionStore()
+    login(request, user, settings.AUTHENTICATION_BACKENDS[0])
+    request.session.save()
+    return request.session.session_key
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочное тестирование: гоняет смесь сценариев через '
+        'yatube.wsgi.application в пуле потоков или процессов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--mode', choices=('threads', 'processes'), default='threads'
+        )
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help=f'Веса сценариев, по умолчанию {DEFAULT_MIX}'
+        )
+        parser.add_argument(
+            '--users', type=int, default=20,
+            help='Сколько авторизованных пользователей создать для теста'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        workers = options['workers']
+        if workers < 1 or options['requests'] < 1 or options['users'] < 1:
+            raise CommandError('Параметры должны быть положительными')
+        context = self.prepare_context(options['users'])
+        share, extra = divmod(options['requests'], workers)
+        jobs = [
+            (options['seed'] + number, share + (number < extra), mix, context)
+            for number in range(workers)
+        ]
+        executor_class = (
+            ProcessPoolExecutor if options['mode'] == 'processes'
+            else ThreadPoolExecutor
+        )
+        connections.close_all()
+        started = time.perf_counter()
+        with executor_class(max_workers=workers) as executor:
+            results = list(executor.map(run_worker, jobs))
+        elapsed = time.perf_counter() - started
+        self.report([sample for batch in results for sample in batch], elapsed)
+
+    def prepare_context(self, users_count):
+        users = [
+            User.objects.get_or_create(
+                username=f'{LOADTEST_USER_PREFIX}{number}'
+            )[0]
+            for number in range(users_count)
+        ]
+        return {
+            'sessions': [open_session(user) for user in users],
+            'usernames': list(
+                User.objects.values_list('username', flat=True)[:SAMPLE_LIMIT]
+            ),
+            'post_ids': list(
+                Post.objects.values_list('id', flat=True)[:SAMPLE_LIMIT]
+            ),
+            'group_ids': list(
+                Group.objects.values_list('id', flat=True)[:SAMPLE_LIMIT]
+            ),
+            'group_slugs': list(
+                Group.objects.values_list('slug', flat=True)[:SAMPLE_LIMIT]
+            ),
+            'csrf_token': get_random_string(64),
+        }
+
+    def report(self, samples, elapsed):
+        latencies = defaultdict(list)
+        statuses = Counter()
+        errors = Counter()
+        for name, status, latency, error in samples:
+            latencies[name].append(latency)
+            latencies['total'].append(latency)
+            statuses[status] += 1
+            if error:
+                errors[error] += 1
+        self.stdout.write(
+            f'Запросов: {len(samples)}, время: {elapsed:.2f} с, '
+            f'пропускная способность: {len(samples) / elapsed:.1f} запр/с'
+        )
+        columns = ''.join(f'{f"p{p}":>9}' for p in PERCENTILES)
+        self.stdout.write(f'{"сценарий":<10}{"кол-во":>8}{columns}{"max":>9}')
+        for name in sorted(latencies, key=lambda key: key == 'total'):
+            values = sorted(latencies[name])
+            cells = ''.join(
+                f'{percentile(values, p) * 1000:>9.1f}' for p in PERCENTILES
+            )
+            self.stdout.write(
+                f'{name:<10}{len(values):>8}{cells}{values[-1] * 1000:>9.1f}'
+            )
+        self.stdout.write('Коды ответов: ' + ', '.join(
+            f'{status}: {count}' for status, count in sorted(statuses.items())
+        ))
+        self.stdout.write(
+            f'Блокировки SQLite: {errors.pop(SQLITE_LOCKED, 0)}'
+        )
+        for error, count in errors.most_common():
+            self.stdout.write(f'Ошибка {error}: {count}')
@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.jobs import (
+    POLL_INTERVAL, VISIBILITY_TIMEOUT, purge_finished, work
+)
+
+KEEP_DAYS: int = 7
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, с'
+        )
+        parser.add_argument(
+            '--visibility-timeout', type=int, default=VISIBILITY_TIMEOUT,
+            help='Через сколько секунд зависшая задача снова доступна'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и выйти'
+        )
+        parser.add_argument(
+            '--keep-days', type=int, default=KEEP_DAYS,
+            help='Сколько дней хранить выполненные задачи'
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError('--processes должен быть больше 0')
+        purged = purge_finished(options['keep_days'])
+        if purged:
+            self.stdout.write(f'Удалено выполненных задач: {purged}')
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(
+                    work,
+                    options['once'],
+                    options['poll_interval'],
+                    options['visibility_timeout'],
+                )
+                for _ in range(processes)
+            ]
+            try:
+                processed = sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                return
+        self.stdout.write(f'Выполнено задач: {processed}')
@@ -0,0 +1,56 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Параметры')
+    dedup_key = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        verbose_name='Ключ дедупликации'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'), name='job_status_run_at_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('dedup_key',),
+                condition=models.Q(status='queued'),
+                name='job_queued_dedup_key_unique'
+            ),
+        )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,30 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from posts.counters import discard_all
+from yatube.settings_test import CACHES
+
+
+class TestRunner(DiscoverRunner):
+    """Запуск manage.py test с настройками кэша из settings_test.
+
+    Общий файл кэша хранит данные прошлых запусков и рабочего сервера,
+    поэтому тесты получают собственный временный файл.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_settings = override_settings(CACHES=CACHES)
+        self.cache_settings.enable()
+
+    def teardown_databases(self, old_config, **kwargs):
+        """Отбрасывает приращения счётчиков, засчитанные в тестах.
+
+        После удаления тестовой базы atexit записал бы их в рабочую.
+        """
+        discard_all()
+        super().teardown_databases(old_config, **kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
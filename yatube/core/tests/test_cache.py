@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import cache as two_tier
+from ..cache import TwoTierCache
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    """Два экземпляра на одном файле ведут себя как два процесса."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.first = self.backend()
+        self.second = self.backend()
+
+    def backend(self, **options):
+        """Экземпляр со своим уровнем процесса, как в другом процессе."""
+        two_tier.PROCESS_TIERS.clear()
+        return TwoTierCache(
+            os.path.join(self.directory, 'cache.sqlite3'),
+            {'OPTIONS': options}
+        )
+
+    def test_write_through(self):
+        """Запись одного процесса видна другому"""
+        self.first.set('key', {'value': 1})
+        self.assertEqual(self.second.get('key'), {'value': 1})
+        self.assertTrue(self.second.has_key('key'))
+        self.assertEqual(
+            self.second.get_many(['key', 'missing']), {'key': {'value': 1}}
+        )
+
+    def test_invalidation_broadcast(self):
+        """Изменение в другом процессе выбрасывает ключ из локального LRU"""
+        self.first.set('key', 1)
+        self.assertEqual(self.second.get('key'), 1)
+        self.first.set('key', 2)
+        self.assertEqual(self.second.get('key'), 2)
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+        self.second.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.first.get('a'), 1)
+        self.second.clear()
+        self.assertEqual(self.first.get_many(['a', 'b']), {})
+
+    def test_local_hits_skip_shared_tier(self):
+        """Повторное чтение без чужих изменений не трогает файл"""
+        self.first.set('key', 1)
+        self.first.get('key')
+        connection = self.first.connection()
+        with mock.patch.object(
+            self.first, 'remember', wraps=self.first.remember
+        ) as remember:
+            self.assertEqual(self.first.get('key'), 1)
+            remember.assert_not_called()
+        self.assertIs(self.first.connection(), connection)
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень ограничен числом записей и байтами"""
+        backend = self.backend(LOCAL_MAX_ENTRIES=2, LOCAL_MAX_BYTES=800)
+        for key in 'abc':
+            backend.set(key, key)
+        self.assertEqual(list(backend.tier.local.entries), [
+            backend.make_key('b'), backend.make_key('c')
+        ])
+        backend.set('big', 'x' * 200)
+        self.assertNotIn(
+            backend.make_key('big'), backend.tier.local.entries
+        )
+        self.assertEqual(backend.get('big'), 'x' * 200)
+        self.assertLessEqual(backend.tier.local.size, 800)
+
+    def test_threads_share_local_tier(self):
+        """Экземпляры потоков одного процесса делят один LRU"""
+        backend = self.backend(LOCAL_MAX_ENTRIES=2)
+        instances = []
+
+        def worker():
+            instances.append(TwoTierCache(backend.path, {}))
+            instances[-1].set('key', 1)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertIs(instances[0].tier, backend.tier)
+        self.assertIn(backend.make_key('key'), backend.tier.local.entries)
+        for key in 'abc':
+            backend.set(key, key)
+        self.assertEqual(len(instances[0].tier.local.entries), 2)
+
+    def test_add_incr_touch_and_expiry(self):
+        """add, incr и touch атомарны в общем уровне"""
+        self.assertTrue(self.first.add('counter', 1))
+        self.assertFalse(self.second.add('counter', 5))
+        self.assertEqual(self.second.incr('counter'), 2)
+        self.assertEqual(self.first.incr('counter', 3), 5)
+        self.assertEqual(self.second.get('counter'), 5)
+        with self.assertRaises(ValueError):
+            self.first.incr('missing')
+        self.first.set('short', 1, timeout=-1)
+        self.assertIsNone(self.second.get('short'))
+        self.assertTrue(self.second.add('short', 2))
+        self.assertTrue(self.second.touch('short', timeout=-1))
+        self.assertIsNone(self.first.get('short'))
+        self.assertFalse(self.first.touch('short'))
+
+    def test_pruned_log_clears_local_tier(self):
+        """Отставший от обрезанного журнала процесс очищает LRU"""
+        self.first.set('key', 1)
+        self.assertEqual(self.second.get('key'), 1)
+        with mock.patch.object(two_tier, 'CHANGES_KEPT', 0):
+            self.first.set('key', 2)
+            self.first.set('other', 1)
+            self.first.cull(self.first.connection())
+        self.first.set('other', 2)
+        self.assertEqual(self.second.get('key'), 2)
+
+    def test_shared_tier_is_culled(self):
+        """Общий файл не растёт больше MAX_ENTRIES"""
+        backend = self.backend(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        backend.set('counter', 1, None)
+        for number in range(30):
+            backend.set(f'key{number}', number)
+        backend.cull(backend.connection())
+        count = backend.connection().execute(
+            'SELECT COUNT(*) FROM cache_entries'
+        ).fetchone()[0]
+        self.assertLessEqual(count, 10)
+        self.assertEqual(backend.get('key29'), 29)
+        self.assertEqual(backend.get('counter'), 1)
+
+    def test_file_is_private(self):
+        """Файл кэша доступен только владельцу"""
+        self.first.set('key', 1)
+        for suffix in ('', '-wal', '-shm'):
+            with self.subTest(suffix=suffix):
+                mode = os.stat(self.first.path + suffix).st_mode
+                self.assertEqual(mode & 0o777, 0o600)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..jobs import claim, enqueue, run_pending, task
+from ..models import Job
+
+CALLS = []
+
+
+@task('tests.record', max_attempts=2)
+def record(value):
+    CALLS.append(value)
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('Сбой задачи')
+
+
+class JobQueueTest(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача из очереди выполняется и помечается выполненной"""
+        job = enqueue('tests.record', {'value': 1})
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, [1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_dedup_key(self):
+        """Дубликат ожидающей задачи не создаётся"""
+        self.assertIsNotNone(enqueue('tests.record', {'value': 1}, 'key'))
+        self.assertIsNone(enqueue('tests.record', {'value': 2}, 'key'))
+        run_pending()
+        self.assertEqual(CALLS, [1])
+        self.assertIsNotNone(enqueue('tests.record', {'value': 3}, 'key'))
+
+    def test_rolled_back_enqueue(self):
+        """Задача из откатанной транзакции не попадает в очередь"""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertIsNone(enqueue('tests.record', {'value': 1}))
+                self.assertFalse(Job.objects.exists())
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+        with transaction.atomic():
+            enqueue('tests.record', {'value': 2})
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, [2])
+
+    def test_retry_with_backoff_then_fail(self):
+        """Упавшая задача откладывается, а после лимита попыток — ошибка"""
+        job = enqueue('tests.fail')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сбой задачи', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_visibility_timeout(self):
+        """Задача зависшего воркера снова становится доступной"""
+        enqueue('tests.record', {'value': 1})
+        job = claim(visibility_timeout=60)
+        self.assertIsNone(claim())
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(claim().pk, job.pk)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        self.assertIsNone(enqueue('tests.record', {'value': 5}))
+        self.assertEqual(CALLS, [5])
+        self.assertFalse(Job.objects.exists())
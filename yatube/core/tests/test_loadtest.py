@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from posts.models import Group, Post
+from ..management.commands.loadtest import (
+    SQLITE_LOCKED, classify_error, parse_mix, percentile
+)
+
+User = get_user_model()
+
+
+class LoadtestHelpersTest(SimpleTestCase):
+    def test_parse_mix(self):
+        """Смесь сценариев разбирается и валидируется"""
+        self.assertEqual(
+            parse_mix('browse=3,feed=1'), {'browse': 3, 'feed': 1}
+        )
+        for value in ('unknown=1', 'browse=x', 'browse=0'):
+            with self.subTest(value=value):
+                with self.assertRaises(CommandError):
+                    parse_mix(value)
+
+    def test_percentile(self):
+        values = list(range(101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_classify_error(self):
+        """Блокировки SQLite считаются отдельно от прочих ошибок"""
+        self.assertIsNone(classify_error(None))
+        self.assertEqual(
+            classify_error(OperationalError('database is locked')),
+            SQLITE_LOCKED
+        )
+        self.assertEqual(classify_error(ValueError()), 'ValueError')
+
+
+class LoadtestCommandTest(TransactionTestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        Post.objects.create(author=author, text='Тестовый пост', group=group)
+
+    def test_command_reports_latency(self):
+        """Команда прогоняет запросы и печатает сводку"""
+        out = StringIO()
+        call_command(
+            'loadtest', requests=12, workers=2, users=2,
+            mix='browse=1,feed=1,comment=1', stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn('Запросов: 12', output)
+        self.assertIn('total', output)
+        self.assertIn('Блокировки SQLite', output)
@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import (
+    Post, Group, Comment, Follow, GroupFollow, ImportCheckpoint, DigestRun,
+    Reaction
+)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +19,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def save_model(self, request, obj, form, change):
+        """Не перезаписывает счётчики поста при редактировании."""
+        if change:
+            obj.save(update_fields=form.changed_data)
+        else:
+            obj.save()
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
@@ -34,7 +44,29 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('user', 'author')
 
 
+class GroupFollowAdmin(admin.ModelAdmin):
+    list_display = ('user', 'group', 'created')
+    list_filter = ('group',)
+
+
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'lines', 'offset', 'updated')
+
+
+class DigestRunAdmin(admin.ModelAdmin):
+    list_display = ('period_start', 'period_end', 'sent', 'finished')
+
+
+class ReactionAdmin(admin.ModelAdmin):
+    list_display = ('post', 'user', 'kind', 'created')
+    list_filter = ('kind',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(GroupFollow, GroupFollowAdmin)
+admin.site.register(ImportCheckpoint, ImportCheckpointAdmin)
+admin.site.register(DigestRun, DigestRunAdmin)
+admin.site.register(Reaction, ReactionAdmin)
@@ -0,0 +1,158 @@
+import hashlib
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_GET
+
+from .models import Comment, Follow, Group, Post, User
+from .utils import POSTS_PER_PAGE, keyset_page
+
+MAX_PAGE_SIZE: int = 100
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'views': 'views',
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'parent': 'parent_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+
+
+def error(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def json_response(request, data):
+    response = JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+    etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Cookie',))
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def requested_fields(request, available):
+    value = request.GET.get('fields')
+    if not value:
+        return list(available)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise ValueError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        raise ValueError('limit должен быть числом')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def select(queryset, fields, available, key_field):
+    """Выбирает только нужные колонки, не создавая объекты моделей.
+
+    id и ключ пагинации выбираются всегда, но в ответ попадают, только
+    если их запросили.
+    """
+    lookups = {available[name] for name in fields} | {'id', key_field}
+    return queryset.values(*sorted(lookups))
+
+
+def feed(request, queryset, available=POST_FIELDS, key_field='pub_date',
+         descending=True):
+    try:
+        fields = requested_fields(request, available)
+        rows, cursor = keyset_page(
+            select(queryset, fields, available, key_field),
+            key_field,
+            request.GET.get('cursor'),
+            page_size(request),
+            descending,
+        )
+    except ValueError as exc:
+        return error(str(exc), 400)
+    next_url = None
+    if cursor:
+        query = request.GET.copy()
+        query['cursor'] = cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+    return json_response(request, {
+        'results': [
+            {name: row[available[name]] for name in fields} for row in rows
+        ],
+        'next': next_url,
+    })
+
+
+@require_GET
+def index(request):
+    return feed(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is None:
+        return error('Группа не найдена', 404)
+    return feed(request, Post.objects.filter(group_id=group_id))
+
+
+@require_GET
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is None:
+        return error('Пользователь не найден', 404)
+    return feed(request, Post.objects.filter(author_id=author_id))
+
+
+@require_GET
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', 401)
+    authors = Follow.objects.filter(user=request.user).values('author_id')
+    return feed(request, Post.objects.filter(author_id__in=authors))
+
+
+@require_GET
+def post_detail(request, post_id):
+    try:
+        fields = requested_fields(request, POST_FIELDS)
+    except ValueError as exc:
+        return error(str(exc), 400)
+    row = Post.objects.filter(pk=post_id).values(
+        *sorted({POST_FIELDS[name] for name in fields})
+    ).first()
+    if row is None:
+        return error('Пост не найден', 404)
+    return json_response(
+        request, {name: row[POST_FIELDS[name]] for name in fields}
+    )
+
+
+@require_GET
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден', 404)
+    return feed(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS,
+        'created',
+        descending=False,
+    )
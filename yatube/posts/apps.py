@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from django.db import connections
+
+        from . import signals  # noqa: F401
+        from .querycache import install_write_tracking
+
+        for connection in connections.all():
+            install_write_tracking(None, connection)
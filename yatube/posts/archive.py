@@ -0,0 +1,118 @@
+from datetime import MAXYEAR, MINYEAR, date, datetime, timedelta
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .bulk import batched, bulk_create
+from .models import MonthlyPostCount, Post
+
+SITE_SCOPE = 'posts'
+
+
+def post_archive_scopes(author_id, group_id):
+    """Области помесячной сводки, в которые попадает запись.
+
+    Имена совпадают с областями версий страниц: posts, author:<id>,
+    group:<id>.
+    """
+    scopes = [SITE_SCOPE, f'author:{author_id}']
+    if group_id:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def month_start(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def period_bounds(year, month=None, day=None):
+    """Полуоткрытый интервал [start, end) года, месяца или дня.
+
+    Границы считаются в текущем часовом поясе. Для несуществующей
+    даты и года, у которого нет конца в пределах datetime, бросает
+    ValueError.
+    """
+    if not MINYEAR <= year < MAXYEAR:
+        raise ValueError(f'Год вне диапазона: {year}')
+    start = date(year, month or 1, day or 1)
+    if day is not None:
+        end = start + timedelta(days=1)
+    elif month is not None:
+        end = (start + timedelta(days=31)).replace(day=1)
+    else:
+        end = start.replace(year=year + 1)
+    return tuple(
+        timezone.make_aware(datetime.combine(value, datetime.min.time()))
+        for value in (start, end)
+    )
+
+
+def count_post(author_id, group_id, pub_date, delta=1, scopes=None):
+    """Меняет помесячную сводку на delta записей за месяц pub_date.
+
+    Недостающие строки заводятся вставкой с ignore_conflicts, поэтому
+    параллельные запросы не падают на уникальности.
+    """
+    scopes = scopes or post_archive_scopes(author_id, group_id)
+    month = month_start(pub_date)
+    MonthlyPostCount.objects.bulk_create(
+        [MonthlyPostCount(scope=scope, month=month) for scope in scopes],
+        ignore_conflicts=True
+    )
+    MonthlyPostCount.objects.filter(scope__in=scopes, month=month).update(
+        count=F('count') + delta
+    )
+
+
+def monthly_counts(prefix=None, field=None):
+    queryset = Post.objects.order_by().annotate(
+        month=TruncMonth('pub_date', output_field=DateField())
+    )
+    if field is None:
+        rows = queryset.values('month').annotate(count=Count('id'))
+        return (
+            MonthlyPostCount(scope=SITE_SCOPE, **row) for row in rows
+        )
+    rows = queryset.filter(**{f'{field}__isnull': False}).values(
+        'month', field
+    ).annotate(count=Count('id'))
+    return (
+        MonthlyPostCount(
+            scope=f'{prefix}:{row[field]}',
+            month=row['month'],
+            count=row['count'],
+        )
+        for row in rows
+    )
+
+
+def rebuild_archive():
+    """Пересчитывает помесячную сводку целиком по таблице постов.
+
+    Нужна после массовых вставок в обход сигналов (seed,
+    import_posts); обычные записи учитываются по одной в count_post.
+    Возвращает число строк сводки.
+    """
+    created = 0
+    with transaction.atomic():
+        MonthlyPostCount.objects.all().delete()
+        for batch in batched(chain(
+            monthly_counts(),
+            monthly_counts('author', 'author_id'),
+            monthly_counts('group', 'group_id'),
+        )):
+            bulk_create(MonthlyPostCount, batch)
+            created += len(batch)
+    return created
+
+
+def archive_months(scope):
+    """Месяцы с записями в области scope от новых к старым."""
+    return list(
+        MonthlyPostCount.objects.filter(
+            scope=scope, count__gt=0
+        ).order_by('-month')
+    )
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connections, router
+
+BATCH_SIZE: int = 1000
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_create(model, objects, batch_size=BATCH_SIZE,
+                ignore_conflicts=False):
+    """bulk_create с пачкой не больше лимита параметров бэкенда.
+
+    Django 2.2 не ограничивает явно переданный batch_size, и SQLite падает
+    на слишком длинных INSERT.
+    """
+    connection = connections[router.db_for_write(model)]
+    fields = model._meta.concrete_fields
+    limit = connection.ops.bulk_batch_size(fields, objects)
+    return model.objects.bulk_create(
+        objects,
+        batch_size=max(min(batch_size, limit), 1),
+        ignore_conflicts=ignore_conflicts,
+    )
+
+
+@contextmanager
+def preserve_auto_now(model, *field_names):
+    """Временно отключает auto_now_add, чтобы сохранить переданные даты.
+
+    Меняет поля модели для всего процесса, поэтому подходит только для
+    management-команд, а не для обработчиков запросов.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
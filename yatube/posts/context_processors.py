@@ -0,0 +1,9 @@
+from .notifications import unread_count
+
+
+def notifications(request):
+    def count():
+        if not request.user.is_authenticated:
+            return 0
+        return unread_count(request.user.pk)
+    return {'unread_notifications': count}
@@ -0,0 +1,143 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.db import DatabaseError, connections
+from django.db.models import Case, F, IntegerField, When
+
+from .bulk import batched
+from .models import Post
+from .querycache import untracked_writes
+
+FLUSH_INTERVAL: float = 5.0
+FLUSH_THRESHOLD: int = 500
+UPDATE_BATCH: int = 300
+
+logger = logging.getLogger(__name__)
+
+BUFFERS = []
+
+
+class CounterBuffer:
+    """Приращения счётчиков, накопленные в памяти процесса.
+
+    Вместо UPDATE на каждое событие приращения суммируются по ключу
+    и записываются пачкой функцией flush_func — раз в interval секунд
+    или когда накопилось threshold событий; если новых событий нет,
+    остаток сбрасывает таймер. При падении процесса теряется не больше
+    этого объёма, при штатной остановке буфер сбрасывается через atexit.
+    """
+
+    def __init__(self, flush_func, interval=FLUSH_INTERVAL,
+                 threshold=FLUSH_THRESHOLD):
+        self.flush_func = flush_func
+        self.interval = interval
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.events = 0
+        self.flushed_at = time.monotonic()
+        self.timer = None
+        BUFFERS.append(self)
+
+    def add(self, key, delta=1):
+        with self.lock:
+            self.pending[key] += delta
+            self.events += 1
+            due = (
+                self.events >= self.threshold
+                or time.monotonic() - self.flushed_at >= self.interval
+            )
+            if not due and self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush_idle)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def flush_idle(self):
+        """Сброс по таймеру, если после события запросов больше не было."""
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.events = 0
+            self.flushed_at = time.monotonic()
+            self.cancel_timer()
+        pending = {key: delta for key, delta in pending.items() if delta}
+        if not pending:
+            return 0
+        try:
+            self.flush_func(pending)
+        except DatabaseError:
+            logger.warning(
+                'Не удалось записать %d счётчиков, повторим позже',
+                len(pending), exc_info=True
+            )
+            with self.lock:
+                self.pending.update(pending)
+            return 0
+        return len(pending)
+
+    def discard(self):
+        with self.lock:
+            self.pending.clear()
+            self.events = 0
+            self.cancel_timer()
+
+
+def increment_by(queryset, key_field, field, deltas,
+                 output_field=None):
+    """UPDATE field = field + n с разным n для каждого ключа.
+
+    Приращения пишутся пачками по UPDATE_BATCH ключей в одном
+    выражении CASE, чтобы не упереться в лимит параметров SQLite.
+    """
+    updated = 0
+    for keys in batched(deltas, UPDATE_BATCH):
+        updated += queryset.filter(**{f'{key_field}__in': keys}).update(**{
+            field: F(field) + Case(
+                *(When(**{key_field: key}, then=deltas[key]) for key in keys),
+                output_field=output_field or IntegerField(),
+            )
+        })
+    return updated
+
+
+def flush_post_views(deltas):
+    with untracked_writes():
+        increment_by(Post.objects.order_by(), 'id', 'views', deltas)
+
+
+post_views = CounterBuffer(flush_post_views)
+
+
+def count_view(post_id):
+    """Засчитывает просмотр поста без записи в базу на каждый запрос.
+
+    Версии страниц при сбросе не меняются: число просмотров
+    приблизительное и обновится на странице вместе с контентом.
+    """
+    post_views.add(post_id)
+
+
+@atexit.register
+def flush_all():
+    for buffer in BUFFERS:
+        buffer.flush()
+
+
+def discard_all():
+    for buffer in BUFFERS:
+        buffer.discard()
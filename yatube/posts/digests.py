@@ -0,0 +1,116 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .bulk import batched
+from .models import DigestRun, Follow, Post, User
+
+FOLLOWERS_PER_PAGE: int = 500
+MESSAGES_PER_BATCH: int = 100
+POSTS_PER_DIGEST: int = 20
+DIGEST_PERIOD = timedelta(days=1)
+DIGEST_SUBJECT = 'Новые записи авторов, на которых вы подписаны'
+
+
+def current_run(now=None):
+    """Незавершённая рассылка или новая — с конца предыдущей до now."""
+    run = DigestRun.objects.filter(finished=False).order_by(
+        'period_end'
+    ).first()
+    if run is not None:
+        return run
+    now = now or timezone.now()
+    previous_end = DigestRun.objects.filter(finished=True).values_list(
+        'period_end', flat=True
+    ).first()
+    return DigestRun.objects.create(
+        period_start=previous_end or now - DIGEST_PERIOD,
+        period_end=now,
+    )
+
+
+def follower_pages(after_id, size=FOLLOWERS_PER_PAGE):
+    """id подписчиков страницами по возрастанию, без OFFSET."""
+    while True:
+        ids = list(
+            Follow.objects.filter(user_id__gt=after_id).order_by(
+                'user_id'
+            ).values_list('user_id', flat=True).distinct()[:size]
+        )
+        if not ids:
+            return
+        yield ids
+        after_id = ids[-1]
+
+
+def build_messages(user_ids, run):
+    users = User.objects.filter(id__in=user_ids).exclude(email='').only(
+        'username', 'first_name', 'last_name', 'email'
+    )
+    users = {user.id: user for user in users}
+    authors_by_user = defaultdict(set)
+    for user_id, author_id in Follow.objects.filter(
+        user_id__in=users
+    ).values_list('user_id', 'author_id'):
+        authors_by_user[user_id].add(author_id)
+    authors = set().union(*authors_by_user.values())
+    posts_by_author = defaultdict(list)
+    for post in Post.objects.filter(
+        author_id__in=authors,
+        pub_date__gt=run.period_start,
+        pub_date__lte=run.period_end,
+    ).select_related('author').only(
+        'text', 'pub_date', 'author__username'
+    ).order_by('-pub_date'):
+        posts_by_author[post.author_id].append(post)
+
+    messages = []
+    for user_id, user in users.items():
+        posts = sorted(
+            (
+                post
+                for author_id in authors_by_user[user_id]
+                for post in posts_by_author[author_id]
+            ),
+            key=lambda post: post.pub_date,
+            reverse=True,
+        )
+        if not posts:
+            continue
+        body = render_to_string('posts/email/digest.txt', {
+            'user': user,
+            'posts': posts[:POSTS_PER_DIGEST],
+            'more': max(len(posts) - POSTS_PER_DIGEST, 0),
+            'site_url': settings.SITE_URL,
+        })
+        messages.append(EmailMessage(DIGEST_SUBJECT, body, to=[user.email]))
+    return messages
+
+
+def send_digests(now=None, page_size=FOLLOWERS_PER_PAGE,
+                 batch_size=MESSAGES_PER_BATCH):
+    """Рассылает по одному письму на подписчика через одно соединение.
+
+    Прогресс сохраняется после каждой страницы подписчиков, поэтому
+    прерванная рассылка продолжается с места остановки.
+    """
+    run = current_run(now)
+    connection = get_connection()
+    connection.open()
+    try:
+        for user_ids in follower_pages(run.last_user_id, page_size):
+            messages = build_messages(user_ids, run)
+            for batch in batched(messages, batch_size):
+                connection.send_messages(batch)
+            run.sent += len(messages)
+            run.last_user_id = user_ids[-1]
+            run.save(update_fields=('sent', 'last_user_id'))
+    finally:
+        connection.close()
+    run.finished = True
+    run.save(update_fields=('finished',))
+    return run
@@ -0,0 +1,78 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import Group, Post, User
+from .querycache import get_cached_or_404
+
+FEED_SIZE: int = 20
+
+
+class LatestPostsFeed(Feed):
+    """Atom-лента последних записей сайта.
+
+    Записи выбираются запросом с LIMIT по индексу pub_date, ленты групп
+    и авторов — по составным индексам (group|author, -pub_date).
+    """
+
+    feed_type = Atom1Feed
+    title = 'Yatube: последние записи'
+    subtitle = 'Новые записи всех авторов'
+
+    def link(self, obj=None):
+        return reverse('posts:main')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj=None):
+        return self.posts(obj).select_related('author')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+
+class GroupFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_cached_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def subtitle(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_posts', args=(obj.slug,))
+
+    def posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_cached_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: записи {obj.username}'
+
+    def subtitle(self, obj):
+        return f'Новые записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
@@ -8,6 +8,19 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def save(self, commit=True):
+        """При редактировании обновляет только поля формы.
+
+        Счётчики поста, например views, меняются приращениями в обход
+        формы, и полный UPDATE затёр бы их значениями из формы.
+        """
+        if not commit or self.instance._state.adding:
+            return super().save(commit)
+        post = super().save(commit=False)
+        post.save(update_fields=self._meta.fields)
+        self._save_m2m()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,301 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from .models import Follow
+from .versions import bump_versions, get_versions
+
+GRAPH_SCOPE = 'follow-graph'
+CHANGES_KEY = 'follow-graph:changes'
+INDEX_MAX_AGE: int = 10 * 60
+CHANGE_TIMEOUT: int = INDEX_MAX_AGE
+CHANGE_WAIT: float = 5.0
+EPOCH_SPAN: int = 10 ** 6
+OVERLAY_LIMIT: int = 10000
+IN_LIST_LIMIT: int = 500
+
+
+def transpose(nodes_count, indptr, indices):
+    """Транспонирует CSR-матрицу подсчётом — без сортировки рёбер."""
+    counts = array('l', [0]) * (nodes_count + 1)
+    for column in indices:
+        counts[column + 1] += 1
+    for position in range(nodes_count):
+        counts[position + 1] += counts[position]
+    result_ptr = array('l', counts)
+    result = array('l', [0]) * len(indices)
+    for row in range(nodes_count):
+        for column in indices[indptr[row]:indptr[row + 1]]:
+            result[counts[column]] = row
+            counts[column] += 1
+    return result_ptr, result
+
+
+class FollowGraph:
+    """Граф подписок в виде двух CSR-матриц на массивах array.
+
+    nodes — отсортированные id пользователей, строки и столбцы матриц —
+    позиции в nodes. following хранит для каждого пользователя позиции
+    авторов, на которых он подписан, followers — обратные рёбра. Соседи
+    в строке отсортированы, поэтому проверка ребра — двоичный поиск.
+    """
+
+    def __init__(self, edges):
+        edges = sorted(set(edges))
+        self.nodes = array('l', sorted(
+            {user_id for edge in edges for user_id in edge}
+        ))
+        positions = {user_id: index for index, user_id in enumerate(
+            self.nodes
+        )}
+        self.following_ptr = array('l', [0])
+        self.following = array('l')
+        row = 0
+        for user_id, author_id in edges:
+            while self.nodes[row] != user_id:
+                self.following_ptr.append(len(self.following))
+                row += 1
+            self.following.append(positions[author_id])
+        while len(self.following_ptr) <= len(self.nodes):
+            self.following_ptr.append(len(self.following))
+        self.followers_ptr, self.followers = transpose(
+            len(self.nodes), self.following_ptr, self.following
+        )
+
+    @classmethod
+    def load(cls):
+        return cls(
+            Follow.objects.order_by().values_list(
+                'user_id', 'author_id'
+            ).iterator()
+        )
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def position(self, user_id):
+        index = bisect_left(self.nodes, user_id)
+        if index < len(self.nodes) and self.nodes[index] == user_id:
+            return index
+        return None
+
+    def row(self, indptr, indices, user_id):
+        index = self.position(user_id)
+        if index is None:
+            return array('l')
+        return indices[indptr[index]:indptr[index + 1]]
+
+    def following_of(self, user_id):
+        """id авторов, на которых подписан user_id, по возрастанию."""
+        return [self.nodes[index] for index in self.row(
+            self.following_ptr, self.following, user_id
+        )]
+
+    def followers_of(self, user_id):
+        """id подписчиков user_id по возрастанию."""
+        return [self.nodes[index] for index in self.row(
+            self.followers_ptr, self.followers, user_id
+        )]
+
+    def following_count(self, user_id):
+        index = self.position(user_id)
+        if index is None:
+            return 0
+        return self.following_ptr[index + 1] - self.following_ptr[index]
+
+    def followers_count(self, user_id):
+        index = self.position(user_id)
+        if index is None:
+            return 0
+        return self.followers_ptr[index + 1] - self.followers_ptr[index]
+
+    def is_following(self, user_id, author_id):
+        user, author = self.position(user_id), self.position(author_id)
+        if user is None or author is None:
+            return False
+        start, end = self.following_ptr[user], self.following_ptr[user + 1]
+        index = bisect_left(self.following, author, start, end)
+        return index < end and self.following[index] == author
+
+
+class FollowIndex:
+    """Граф подписок процесса с журналом изменений поверх CSR.
+
+    Подписки и отписки хранятся в оверлее по пользователям: following
+    — пользователь → {автор: есть ли подписка}, followers — обратный
+    словарь, поэтому чтение строки не просматривает весь оверлей.
+    Изменения всех процессов идут через общий журнал в кэше: процесс
+    догоняет его по номеру CHANGES_KEY и перезагружает граф только
+    при смене версии GRAPH_SCOPE, потере записей журнала, смене эпохи
+    счётчика или переполнении оверлея.
+    """
+
+    def __init__(self, graph, version, seq):
+        self.graph = graph
+        self.version = version
+        self.seq = seq
+        self.loaded_at = time.monotonic()
+        self.lock = threading.RLock()
+        self.following = defaultdict(dict)
+        self.followers = defaultdict(dict)
+        self.following_delta = Counter()
+        self.followers_delta = Counter()
+        self.changes = 0
+        self.missing = None
+
+    def is_stale(self, version):
+        return (
+            version != self.version
+            or time.monotonic() - self.loaded_at > INDEX_MAX_AGE
+            or self.changes > OVERLAY_LIMIT
+        )
+
+    def catch_up(self, seq):
+        """Применяет записи журнала до seq; False — граф надо загрузить."""
+        with self.lock:
+            if seq == self.seq:
+                return True
+            if seq < self.seq or seq - self.seq > OVERLAY_LIMIT:
+                return False
+            numbers = range(self.seq + 1, seq + 1)
+            changes = cache.get_many([change_key(n) for n in numbers])
+            for number in numbers:
+                change = changes.get(change_key(number))
+                if change is None:
+                    return self.wait_for(number)
+                self.apply(*change)
+                self.seq = number
+            return True
+
+    def wait_for(self, number):
+        """Запись журнала ещё не дописана другим процессом или потеряна.
+
+        Номер выдаётся раньше, чем пишется сама запись, поэтому короткий
+        пропуск ждём; пропуск дольше CHANGE_WAIT считаем потерей.
+        """
+        if self.missing is None or self.missing[0] != number:
+            self.missing = (number, time.monotonic())
+        return time.monotonic() - self.missing[1] < CHANGE_WAIT
+
+    def apply(self, user_id, author_id, present):
+        with self.lock:
+            if present == self.is_following(user_id, author_id):
+                return
+            if present == self.graph.is_following(user_id, author_id):
+                self.following[user_id].pop(author_id, None)
+                self.followers[author_id].pop(user_id, None)
+            else:
+                self.following[user_id][author_id] = present
+                self.followers[author_id][user_id] = present
+            delta = 1 if present else -1
+            self.following_delta[user_id] += delta
+            self.followers_delta[author_id] += delta
+            self.changes += 1
+
+    def is_following(self, user_id, author_id):
+        with self.lock:
+            present = self.following.get(user_id, {}).get(author_id)
+        if present is None:
+            return self.graph.is_following(user_id, author_id)
+        return present
+
+    def following_of(self, user_id):
+        return self.merged(
+            self.graph.following_of(user_id), self.following, user_id
+        )
+
+    def followers_of(self, user_id):
+        return self.merged(
+            self.graph.followers_of(user_id), self.followers, user_id
+        )
+
+    def merged(self, base, overlay, user_id):
+        with self.lock:
+            changes = dict(overlay.get(user_id, {}))
+        if not changes:
+            return base
+        return sorted(
+            {user for user in base if changes.get(user, True)}
+            | {user for user, present in changes.items() if present}
+        )
+
+    def following_count(self, user_id):
+        with self.lock:
+            delta = self.following_delta[user_id]
+        return self.graph.following_count(user_id) + delta
+
+    def followers_count(self, user_id):
+        with self.lock:
+            delta = self.followers_delta[user_id]
+        return self.graph.followers_count(user_id) + delta
+
+
+_index = None
+
+
+def change_key(seq):
+    return f'{CHANGES_KEY}:{seq}'
+
+
+def current_seq():
+    """Номер последней записи журнала изменений графа.
+
+    Пропавший из кэша счётчик заводится заново с эпохи — времени в мс,
+    умноженного на EPOCH_SPAN. Новая нумерация уходит далеко от
+    прежней, и процессы перезагружают граф, а не принимают новые
+    записи за уже прочитанные.
+    """
+    seq = cache.get(CHANGES_KEY)
+    if seq is None:
+        cache.add(CHANGES_KEY, int(time.time() * 1000) * EPOCH_SPAN, None)
+        seq = cache.get(CHANGES_KEY, 0)
+    return seq
+
+
+def follow_graph():
+    """Граф подписок процесса, актуальный по общему журналу изменений."""
+    global _index
+    version, = get_versions(GRAPH_SCOPE)
+    seq = current_seq()
+    index = _index
+    if index is None or index.is_stale(version) or not index.catch_up(seq):
+        index = _index = FollowIndex(FollowGraph.load(), version, seq)
+    return index
+
+
+def followed_authors(user_id):
+    """Авторы, на которых подписан user_id, для фильтра author_id__in.
+
+    Короткий список берётся из графа, длинный заменяется подзапросом
+    к подпискам: SQLite ограничивает число параметров запроса, в
+    старых сборках — 999.
+    """
+    authors = follow_graph().following_of(user_id)
+    if len(authors) <= IN_LIST_LIMIT:
+        return authors
+    return Follow.objects.filter(user_id=user_id).values('author_id')
+
+
+def follow_edge_changed(user_id, author_id, present):
+    """Пишет подписку или отписку в общий журнал изменений графа.
+
+    Вызывается после коммита, поэтому откатанные изменения в журнал
+    не попадают. Графы процессов, включая текущий, применят запись
+    при следующем обращении к follow_graph.
+    """
+    current_seq()
+    try:
+        seq = cache.incr(CHANGES_KEY)
+    except ValueError:
+        invalidate_follow_graph()
+        return
+    cache.set(change_key(seq), (user_id, author_id, present), CHANGE_TIMEOUT)
+
+
+def invalidate_follow_graph():
+    """Для массовых изменений в обход сигналов, например из seed."""
+    bump_versions(GRAPH_SCOPE)
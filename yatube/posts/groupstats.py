@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DateTimeField, F, Max, Q, Value, When
+)
+from django.utils import timezone
+
+from core.jobs import enqueue
+from .bulk import BATCH_SIZE, batched, bulk_create
+from .models import Group, GroupStats, Post
+from .versions import bump_versions
+
+ACTIVE_PERIOD = timedelta(days=7)
+UPDATE_INTERVAL: int = 60 * 60
+
+
+def refresh_group_stats(group_ids=None, batch_size=BATCH_SIZE):
+    """Пересчитывает статистику групп по таблице постов.
+
+    Без group_ids пересчитываются все группы пачками: на пачку один
+    запрос с GROUP BY и одна транзакция записи. Возвращает число
+    обновлённых групп.
+    """
+    if group_ids is None:
+        group_ids = list(
+            Group.objects.order_by('pk').values_list('pk', flat=True)
+        )
+    since = timezone.now() - ACTIVE_PERIOD
+    updated = 0
+    for batch in batched(group_ids, batch_size):
+        rows = Group.objects.filter(pk__in=batch).order_by().values(
+            'pk'
+        ).annotate(
+            posts_count=Count('posts'),
+            last_post=Max('posts__pub_date'),
+            active_authors=Count(
+                'posts__author',
+                distinct=True,
+                filter=Q(posts__pub_date__gte=since)
+            ),
+        )
+        stats = [
+            GroupStats(
+                group_id=row['pk'],
+                posts_count=row['posts_count'],
+                last_post=row['last_post'],
+                active_authors=row['active_authors'],
+            )
+            for row in rows
+        ]
+        with transaction.atomic():
+            GroupStats.objects.filter(group_id__in=batch).delete()
+            bulk_create(GroupStats, stats)
+        updated += len(stats)
+    if updated:
+        bump_versions('groups')
+    return updated
+
+
+def count_group_post(post):
+    """Учитывает новую запись в статистике её группы без пересчёта.
+
+    Число активных авторов растёт, если у автора не было записей
+    в группе за ACTIVE_PERIOD; выбывание авторов из окна учитывает
+    периодический пересчёт.
+    """
+    since = post.pub_date - ACTIVE_PERIOD
+    new_author = not Post.objects.filter(
+        group_id=post.group_id,
+        author_id=post.author_id,
+        pub_date__gte=since,
+    ).exclude(pk=post.pk).exists()
+    updated = GroupStats.objects.filter(group_id=post.group_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post=Case(
+            When(last_post__gt=post.pub_date, then=F('last_post')),
+            default=Value(post.pub_date, output_field=DateTimeField()),
+            output_field=DateTimeField(),
+        ),
+        active_authors=F('active_authors') + int(new_author),
+        updated=timezone.now(),
+    )
+    if updated:
+        bump_versions('groups')
+    else:
+        refresh_group_stats([post.group_id])
+
+
+def schedule_group_stats(delay=UPDATE_INTERVAL):
+    return enqueue(
+        'posts.update_group_stats',
+        dedup_key='update-group-stats',
+        delay=delay
+    )
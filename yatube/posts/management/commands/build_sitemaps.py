@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import SHARD_SIZE, build_sitemaps, schedule_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статические файлы карты сайта со всеми записями; '
+        'с --schedule ставит ежедневную сборку в очередь фоновых задач'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            help='Адрес сайта для ссылок, по умолчанию SITE_URL'
+        )
+        parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Запускать сборку воркерами раз в сутки'
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_sitemaps(delay=0)
+            self.stdout.write('Сборка поставлена в очередь')
+            return
+        shards, urls = build_sitemaps(
+            options['base_url'], shard_size=options['shard_size']
+        )
+        self.stdout.write(f'Карта сайта: {shards} файлов, {urls} адресов')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (
+    CHUNK_SIZE, EXPORTS, FORMATS, export_lines, parse_since
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка постов, комментариев или подписок в JSONL/CSV; '
+        'с --since выгружаются только записи с id больше отметки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--since',
+            help='id последней выгруженной записи'
+        )
+        parser.add_argument('--output', help='Файл, по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['name'], options['since'])
+        except ValueError as error:
+            raise CommandError(error)
+        lines = export_lines(
+            options['name'], options['format'], since, options['chunk_size']
+        )
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            output.writelines(lines)
@@ -0,0 +1,264 @@
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.archive import rebuild_archive
+from posts.bulk import BATCH_SIZE, batched, bulk_create, preserve_auto_now
+from posts.groupstats import refresh_group_stats
+from posts.models import (
+    COMMENT_PATH_STEP, Comment, Group, ImportCheckpoint, Post
+)
+from posts.threads import fill_root_paths
+from posts.versions import bump_versions
+
+User = get_user_model()
+
+CHUNK_SIZE: int = 10000
+LOOKUP_BATCH: int = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт постов и комментариев из JSONL. Каждая строка — объект '
+        'с type "post" (id, text, author, group, image, pub_date) или '
+        '"comment" (id, post, author, text, created); author — username, '
+        'group — slug. Записи с id, уже занятым в базе, и комментарии '
+        'к отсутствующим постам пропускаются. После сбоя импорт '
+        'продолжается с контрольной точки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя контрольной точки, по умолчанию имя файла'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать импорт с начала файла'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл {path} не найден')
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            name=options['checkpoint'] or os.path.basename(path)
+        )
+        if options['restart']:
+            checkpoint.offset = checkpoint.lines = 0
+            checkpoint.save()
+        elif checkpoint.lines:
+            self.stdout.write(f'Продолжаем со строки {checkpoint.lines + 1}')
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.now = timezone.now()
+        self.skipped = 0
+        self.conflicts = 0
+        self.imported_posts = set()
+        self.rejected_posts = set()
+        imported = 0
+
+        with open(path, 'rb') as source, \
+                preserve_auto_now(Post, 'pub_date'), \
+                preserve_auto_now(Comment, 'created'):
+            source.seek(checkpoint.offset)
+            eof = False
+            while not eof:
+                first_line = checkpoint.lines + 1
+                records, lines, eof = self.read_chunk(
+                    source, options['chunk_size'], checkpoint.lines
+                )
+                posts, comments, scopes = self.build(records)
+                try:
+                    with transaction.atomic():
+                        bulk_create(Post, posts, options['batch_size'])
+                        last_id = Comment.objects.aggregate(
+                            last=Max('id')
+                        )['last'] or 0
+                        bulk_create(Comment, comments, options['batch_size'])
+                        fill_root_paths(last_id)
+                        checkpoint.offset = source.tell()
+                        checkpoint.lines = lines
+                        checkpoint.save()
+                except IntegrityError as error:
+                    raise CommandError(f'Строки {first_line}-{lines}: {error}')
+                bump_versions(*scopes)
+                imported += len(posts) + len(comments)
+                self.stdout.write(f'Строк: {lines}, импортировано: {imported}')
+        self.reset_sequences()
+        refresh_group_stats()
+        rebuild_archive()
+        self.stdout.write(
+            f'Готово: импортировано {imported}, пропущено {self.skipped}, '
+            f'конфликтов id {self.conflicts}'
+        )
+
+    def read_chunk(self, source, size, line_number):
+        records = []
+        while len(records) < size:
+            raw = source.readline()
+            if not raw:
+                return records, line_number, True
+            line_number += 1
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                raise CommandError(f'Строка {line_number}: некорректный JSON')
+            records.append((line_number, record))
+        return records, line_number, False
+
+    def parse_date(self, value):
+        if not value:
+            return self.now
+        date = parse_datetime(value)
+        if date is None:
+            raise ValueError(f'некорректная дата {value}')
+        if timezone.is_naive(date):
+            date = timezone.make_aware(date, timezone.utc)
+        return date
+
+    @staticmethod
+    def parse_id(value):
+        if value in (None, ''):
+            return None
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = 0
+        if number <= 0:
+            raise ValueError(f'некорректный id {value}')
+        return number
+
+    @staticmethod
+    def existing(model, ids):
+        """id из ids, уже занятые строками model."""
+        found = set()
+        for batch in batched(set(ids), LOOKUP_BATCH):
+            found.update(
+                model.objects.filter(pk__in=batch).values_list('pk', flat=True)
+            )
+        return found
+
+    def parse(self, records):
+        """Записи чанка с известным автором: (строка, тип, id, пост, запись).
+
+        id постов, пропущенных из-за автора, запоминаются, чтобы не
+        привязать их комментарии к чужому посту с тем же id.
+        """
+        parsed = []
+        for line_number, record in records:
+            kind = record.get('type', 'post')
+            try:
+                record_id = self.parse_id(record.get('id'))
+                post_id = (
+                    self.parse_id(record['post']) if kind == 'comment'
+                    else None
+                )
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+            author_id = self.users.get(record.get('author'))
+            if author_id is None or kind not in ('post', 'comment'):
+                self.skipped += 1
+                if kind == 'post' and record_id:
+                    self.rejected_posts.add(record_id)
+                continue
+            parsed.append((line_number, kind, record_id, post_id, record))
+        return parsed
+
+    def build(self, records):
+        """Посты и комментарии чанка и области версий, которые они меняют.
+
+        id из файла сохраняются, только если свободны: запись с id,
+        занятым в базе или встреченным раньше, пропускается как конфликт.
+        Комментарий сохраняется, только если его пост уже импортирован
+        или был в базе, — иначе чанк упал бы на внешнем ключе.
+        """
+        parsed = self.parse(records)
+        scopes = set()
+        posts = self.build_posts(
+            [row for row in parsed if row[1] == 'post'], scopes
+        )
+        comments = self.build_comments(
+            [row for row in parsed if row[1] == 'comment'], scopes
+        )
+        return posts, comments, scopes
+
+    def build_posts(self, rows, scopes):
+        taken = self.existing(Post, [row[2] for row in rows if row[2]])
+        posts = []
+        for line_number, _, record_id, _, record in rows:
+            if record_id in taken or record_id in self.imported_posts:
+                self.conflicts += 1
+                if record_id not in self.imported_posts:
+                    self.rejected_posts.add(record_id)
+                continue
+            try:
+                post = Post(
+                    id=record_id,
+                    text=record['text'],
+                    author_id=self.users[record['author']],
+                    group_id=self.groups.get(record.get('group')),
+                    image=record.get('image') or '',
+                    pub_date=self.parse_date(record.get('pub_date')),
+                )
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+            posts.append(post)
+            if record_id:
+                self.imported_posts.add(record_id)
+            scopes.update(('posts', f'author:{post.author_id}'))
+            if post.group_id:
+                scopes.add(f'group:{post.group_id}')
+        return posts
+
+    def build_comments(self, rows, scopes):
+        taken = self.existing(Comment, [row[2] for row in rows if row[2]])
+        targets = self.existing(Post, [
+            row[3] for row in rows if row[3] not in self.imported_posts
+        ])
+        comments = []
+        for line_number, _, record_id, post_id, record in rows:
+            if post_id in self.rejected_posts or (
+                post_id not in self.imported_posts and post_id not in targets
+            ):
+                self.skipped += 1
+                continue
+            if record_id in taken:
+                self.conflicts += 1
+                continue
+            try:
+                comments.append(Comment(
+                    id=record_id,
+                    path=str(record_id).zfill(COMMENT_PATH_STEP)
+                    if record_id else '',
+                    post_id=post_id,
+                    author_id=self.users[record['author']],
+                    text=record['text'],
+                    created=self.parse_date(record.get('created')),
+                ))
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+            if record_id:
+                taken.add(record_id)
+            scopes.add(f'post:{post_id}')
+        return comments
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
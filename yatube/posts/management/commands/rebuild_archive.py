@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import rebuild_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает помесячную сводку записей для архива, '
+        'например после массовой вставки в обход сигналов'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_archive()
+        self.stdout.write(f'Сводка пересчитана: {rows} строк')
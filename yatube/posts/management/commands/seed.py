@@ -0,0 +1,271 @@
+import io
+import random
+from array import array
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts.archive import rebuild_archive
+from posts.bulk import (
+    BATCH_SIZE, batched, bulk_create, preserve_auto_now
+)
+from posts.graph import invalidate_follow_graph
+from posts.groupstats import refresh_group_stats
+from posts.models import Comment, Follow, Group, Post
+from posts.threads import fill_root_paths
+from posts.versions import bump_versions
+
+User = get_user_model()
+
+TRANSACTION_SIZE: int = 100_000
+SENTENCE_POOL: int = 2000
+AUTHOR_SKEW: float = 3.0
+GROUP_SKEW: float = 2.0
+POST_SKEW: float = 4.0
+FOLLOW_SKEW: float = 2.5
+GROUP_SHARE: float = 0.7
+IMAGE_SHARE: float = 0.3
+IMAGE_SIZE = (960, 339)
+
+
+def skewed_index(rng, size, exponent):
+    """Индекс с распределением по степенному закону: малые чаще больших."""
+    return min(int(size * rng.random() ** exponent), size - 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует пользователей, группы, посты, комментарии и подписки '
+        'пачками bulk_create; результат детерминирован для --seed и --until'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько картинок сгенерировать для постов'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --until распределить посты'
+        )
+        parser.add_argument(
+            '--until',
+            help='Дата ГГГГ-ММ-ДД, до которой генерируются посты, '
+                 'по умолчанию сегодня'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--transaction-size', type=int, default=TRANSACTION_SIZE
+        )
+        parser.add_argument('--password', default='yatube')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.transaction_size = options['transaction_size']
+        self.until = self.parse_until(options['until'])
+        self.scopes = {'posts', 'groups'}
+        self.sentences = [
+            self.fake.sentence() for _ in range(SENTENCE_POOL)
+        ]
+        if options['users'] < 1 and not User.objects.exists():
+            raise CommandError('Для постов нужен хотя бы один пользователь')
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+
+        user_ids = self.create_users(options['users'], options['password'])
+        group_ids = self.create_groups(options['groups'])
+        images = self.create_images(options['images'], options['seed'])
+        post_ids, post_dates = self.create_posts(
+            options['posts'], user_ids, group_ids, images, options['days']
+        )
+        refresh_group_stats()
+        rebuild_archive()
+        self.create_comments(
+            options['comments'], user_ids, post_ids, post_dates
+        )
+        self.create_follows(options['follows'], user_ids)
+        for scopes in batched(sorted(self.scopes), self.batch_size):
+            bump_versions(*scopes)
+
+    def parse_until(self, value):
+        if value is None:
+            today = timezone.now().date()
+        else:
+            try:
+                today = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--until должен быть в формате ГГГГ-ММ-ДД')
+        return timezone.make_aware(
+            datetime.combine(today, datetime.min.time()), timezone.utc
+        ).timestamp()
+
+    def text(self, min_sentences, max_sentences):
+        count = self.rng.randint(min_sentences, max_sentences)
+        return ' '.join(self.rng.choices(self.sentences, k=count))
+
+    def insert(self, model, objects, label):
+        """Вставляет объекты пачками и возвращает id новых строк по порядку."""
+        last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        total = 0
+        for chunk in batched(objects, self.transaction_size):
+            with transaction.atomic():
+                bulk_create(model, chunk, self.batch_size)
+            total += len(chunk)
+            self.stdout.write(f'{label}: {total}')
+        return array('q', model.objects.filter(
+            id__gt=last_id
+        ).order_by('id').values_list('id', flat=True).iterator())
+
+    def create_users(self, count, password):
+        """Пользователи с именами вида <имя>_<номер>.
+
+        Имена Faker сами бывают с цифрами на конце, поэтому номер
+        отделён подчёркиванием. Номера начинаются с наибольшего id:
+        строка номер n получает id больше него, и следующий запуск
+        не повторит ни один номер.
+        """
+        offset = User.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        password = make_password(password)
+        users = (
+            User(
+                username=f'{self.fake.user_name()}_{offset + number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=self.fake.email(),
+                password=password,
+            )
+            for number in range(count)
+        )
+        self.insert(User, users, 'Пользователи')
+        return array('q', User.objects.order_by('id').values_list(
+            'id', flat=True
+        ).iterator())
+
+    def create_groups(self, count):
+        offset = Group.objects.count()
+        groups = (
+            Group(
+                title=self.fake.word().capitalize(),
+                slug=f'group-{offset + number}',
+                description=self.text(1, 3),
+            )
+            for number in range(count)
+        )
+        return self.insert(Group, groups, 'Группы')
+
+    def create_images(self, count, seed):
+        names = []
+        for number in range(count):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'PNG')
+            names.append(default_storage.save(
+                f'posts/seed_{seed}_{number}.png', ContentFile(
+                    buffer.getvalue()
+                )
+            ))
+        return names
+
+    def create_posts(self, count, user_ids, group_ids, images, days):
+        dates = array('d')
+        start = self.until - days * 24 * 60 * 60
+
+        def generate():
+            for _ in range(count):
+                timestamp = self.rng.uniform(start, self.until)
+                dates.append(timestamp)
+                group_id = None
+                if group_ids and self.rng.random() < GROUP_SHARE:
+                    group_id = group_ids[skewed_index(
+                        self.rng, len(group_ids), GROUP_SKEW
+                    )]
+                image = ''
+                if images and self.rng.random() < IMAGE_SHARE:
+                    image = self.rng.choice(images)
+                author_id = user_ids[skewed_index(
+                    self.rng, len(user_ids), AUTHOR_SKEW
+                )]
+                self.scopes.add(f'author:{author_id}')
+                if group_id:
+                    self.scopes.add(f'group:{group_id}')
+                yield Post(
+                    text=self.text(1, 6),
+                    author_id=author_id,
+                    group_id=group_id,
+                    image=image,
+                    pub_date=datetime.fromtimestamp(timestamp, timezone.utc),
+                )
+
+        with preserve_auto_now(Post, 'pub_date'):
+            post_ids = self.insert(Post, generate(), 'Посты')
+        return post_ids, dates
+
+    def create_comments(self, count, user_ids, post_ids, post_dates):
+        if not post_ids:
+            return
+
+        def generate():
+            for _ in range(count):
+                index = skewed_index(self.rng, len(post_ids), POST_SKEW)
+                delay = timedelta(hours=self.rng.expovariate(1 / 12))
+                created = min(
+                    datetime.fromtimestamp(post_dates[index], timezone.utc)
+                    + delay,
+                    datetime.fromtimestamp(self.until, timezone.utc)
+                )
+                yield Comment(
+                    post_id=post_ids[index],
+                    author_id=self.rng.choice(user_ids),
+                    text=self.text(1, 2),
+                    created=created,
+                )
+
+        last_id = Comment.objects.aggregate(last=Max('id'))['last'] or 0
+        with preserve_auto_now(Comment, 'created'):
+            self.insert(Comment, generate(), 'Комментарии')
+        fill_root_paths(last_id)
+
+    def create_follows(self, count, user_ids):
+        if len(user_ids) < 2:
+            return
+        existing = set(Follow.objects.values_list('user_id', 'author_id'))
+        count = min(count, len(user_ids) * (len(user_ids) - 1) - len(existing))
+
+        def generate():
+            created = 0
+            while created < count:
+                user_id = self.rng.choice(user_ids)
+                author_id = user_ids[skewed_index(
+                    self.rng, len(user_ids), FOLLOW_SKEW
+                )]
+                if user_id == author_id or (user_id, author_id) in existing:
+                    continue
+                existing.add((user_id, author_id))
+                self.scopes.update((
+                    f'follow:{user_id}', f'author:{user_id}',
+                    f'author:{author_id}'
+                ))
+                created += 1
+                yield Follow(user_id=user_id, author_id=author_id)
+
+        self.insert(Follow, generate(), 'Подписки')
+        invalidate_follow_graph()
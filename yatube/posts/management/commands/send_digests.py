@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import (
+    FOLLOWERS_PER_PAGE, MESSAGES_PER_BATCH, send_digests
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам дайджест новых постов с прошлой рассылки; '
+        'запускается периодически, например из cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=FOLLOWERS_PER_PAGE
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=MESSAGES_PER_BATCH
+        )
+
+    def handle(self, *args, **options):
+        run = send_digests(
+            page_size=options['page_size'], batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Период {run}: отправлено писем {run.sent}')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.bulk import BATCH_SIZE
+from posts.groupstats import refresh_group_stats, schedule_group_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику групп для каталога; '
+        'с --schedule ставит ежечасный пересчёт в очередь фоновых задач'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Запускать пересчёт воркерами раз в час'
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_group_stats(delay=0)
+            self.stdout.write('Пересчёт поставлен в очередь')
+            return
+        updated = refresh_group_stats(batch_size=options['batch_size'])
+        self.stdout.write(f'Статистика обновлена для {updated} групп')
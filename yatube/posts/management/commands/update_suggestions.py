@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.bulk import BATCH_SIZE
+from posts.suggestions import schedule_suggestions, update_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» по графу подписок; '
+        'с --schedule ставит ежедневный пересчёт в очередь фоновых задач'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Запускать пересчёт воркерами раз в сутки'
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_suggestions(delay=0)
+            self.stdout.write('Пересчёт поставлен в очередь')
+            return
+        updated = update_suggestions(options['batch_size'])
+        self.stdout.write(f'Рекомендации обновлены для {updated} польз.')
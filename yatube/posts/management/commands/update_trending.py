@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import schedule_trending, update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает популярные записи по новым событиям; с --schedule '
+        'ставит периодический пересчёт в очередь фоновых задач'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Запускать пересчёт воркерами каждые несколько минут'
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_trending(delay=0)
+            self.stdout.write('Пересчёт поставлен в очередь')
+            return
+        updated = update_trending()
+        self.stdout.write(f'Обновлено рейтингов постов: {updated}')
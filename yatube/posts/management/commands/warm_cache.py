@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.warmup import (
+    WARM_AUTHORS, WARM_GROUPS, WARM_PAGES, WARM_WORKERS, warm_cache
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш после деплоя: первые страницы главной, активные '
+        'группы, популярных авторов и миниатюры последних постов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=WARM_PAGES)
+        parser.add_argument('--groups', type=int, default=WARM_GROUPS)
+        parser.add_argument('--authors', type=int, default=WARM_AUTHORS)
+        parser.add_argument('--workers', type=int, default=WARM_WORKERS)
+
+    def handle(self, *args, **options):
+        warmed, failed, thumbnails = warm_cache(
+            options['pages'], options['groups'], options['authors'],
+            options['workers']
+        )
+        self.stdout.write(
+            f'Прогрето страниц: {warmed}, с ошибкой: {failed}, '
+            f'миниатюр: {thumbnails}'
+        )
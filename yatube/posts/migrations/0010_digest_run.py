@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(verbose_name='Начало периода')),
+                ('period_end', models.DateTimeField(verbose_name='Конец периода')),
+                ('last_user_id', models.IntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Отправлено')),
+                ('finished', models.BooleanField(db_index=True, default=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Рассылка дайджеста',
+                'verbose_name_plural': 'Рассылки дайджестов',
+                'ordering': ('-period_end',),
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('love', '❤️'), ('laugh', '😂'), ('sad', '😢')], max_length=10, verbose_name='Реакция')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_counts', to='posts.Post', verbose_name='Запись')),
+            ],
+            options={
+                'verbose_name': 'Счётчик реакций',
+                'verbose_name_plural': 'Счётчики реакций',
+            },
+        ),
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('love', '❤️'), ('laugh', '😂'), ('sad', '😢')], max_length=10, verbose_name='Реакция')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='posts.Post', verbose_name='Запись')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Реакция',
+                'verbose_name_plural': 'Реакции',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reactioncount',
+            constraint=models.UniqueConstraint(fields=('post', 'kind'), name='reaction_count_post_kind_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='reaction_user_post_uniq'),
+        ),
+    ]
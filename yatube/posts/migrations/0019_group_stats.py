@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:58
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    since = timezone.now() - timedelta(days=7)
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group['pk'],
+            posts_count=group['posts_count'],
+            last_post=group['last_post'],
+            active_authors=group['active_authors'],
+        )
+        for group in Group.objects.order_by().values('pk').annotate(
+            posts_count=models.Count('posts'),
+            last_post=models.Max('posts__pub_date'),
+            active_authors=models.Count(
+                'posts__author',
+                distinct=True,
+                filter=models.Q(posts__pub_date__gte=since)
+            ),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_group_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последняя запись')),
+                ('active_authors', models.PositiveIntegerField(default=0, verbose_name='Активных авторов')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_post', 'group'], name='group_stats_activity_idx'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
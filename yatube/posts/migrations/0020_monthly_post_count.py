@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:01
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def fill_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    MonthlyPostCount = apps.get_model('posts', 'MonthlyPostCount')
+    posts = Post.objects.order_by().annotate(
+        month=TruncMonth('pub_date', output_field=models.DateField())
+    )
+    rows = [
+        MonthlyPostCount(scope='posts', **row)
+        for row in posts.values('month').annotate(count=models.Count('id'))
+    ]
+    for prefix, field in (('author', 'author_id'), ('group', 'group_id')):
+        rows.extend(
+            MonthlyPostCount(
+                scope=f'{prefix}:{row[field]}',
+                month=row['month'],
+                count=row['count'],
+            )
+            for row in posts.filter(**{f'{field}__isnull': False}).values(
+                'month', field
+            ).annotate(count=models.Count('id'))
+        )
+    MonthlyPostCount.objects.bulk_create(rows, batch_size=300)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, verbose_name='Область')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('count', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Записи за месяц',
+                'verbose_name_plural': 'Записи по месяцам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypostcount',
+            constraint=models.UniqueConstraint(fields=('scope', 'month'), name='monthly_post_count_scope_month_uniq'),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
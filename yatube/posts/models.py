@@ -4,6 +4,8 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 CHARS_IN_TEXT = 15
+COMMENT_PATH_STEP = 10
+COMMENT_MAX_DEPTH = 20
 
 
 class Group(models.Model):
@@ -17,6 +19,39 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',)
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Записей')
+    last_post = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя запись')
+    active_authors = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Активных авторов')
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-last_post', 'group'),
+                name='group_stats_activity_idx'
+            ),
+        )
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return f'{self.group_id}: {self.posts_count}'
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст',
@@ -44,9 +79,23 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Просмотры')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_pub_date_idx'
+            ),
+        )
         verbose_name = 'Запись'
         verbose_name_plural = 'Записи'
 
@@ -54,6 +103,25 @@ class Post(models.Model):
         return self.text[:CHARS_IN_TEXT]
 
 
+class MonthlyPostCount(models.Model):
+    scope = models.CharField(max_length=64, verbose_name='Область')
+    month = models.DateField(verbose_name='Месяц')
+    count = models.IntegerField(default=0, verbose_name='Записей')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('scope', 'month'),
+                name='monthly_post_count_scope_month_uniq'
+            ),
+        )
+        verbose_name = 'Записи за месяц'
+        verbose_name_plural = 'Записи по месяцам'
+
+    def __str__(self):
+        return f'{self.scope} {self.month:%Y-%m}: {self.count}'
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -69,7 +137,49 @@ class Comment(models.Model):
         verbose_name='Текст',
         help_text='Введите текст комментария'
     )
-    created = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата')
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на',)
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'path'),
+                name='comment_post_path_idx'
+            ),
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_created_idx'
+            ),
+        )
+
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий и дописывает его материализованный путь.
+
+        Путь — цепочка id предков, дополненных нулями до одной длины,
+        поэтому сортировка по path даёт порядок показа ветки. Ответы
+        глубже COMMENT_MAX_DEPTH прикрепляются к предку уровнем выше.
+        """
+        if self.pk is None and self.parent is not None:
+            if self.parent.depth + 1 >= COMMENT_MAX_DEPTH:
+                self.parent = self.parent.parent
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if not self.path:
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = prefix + str(self.pk).zfill(COMMENT_PATH_STEP)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
 
 class Follow(models.Model):
@@ -83,3 +193,259 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Пользователь',)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа',)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'group'),
+                name='group_follow_user_group_uniq'
+            ),
+        )
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+
+    def __str__(self):
+        return f'{self.user_id} → {self.group_id}'
+
+
+class ImportCheckpoint(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    offset = models.BigIntegerField(default=0)
+    lines = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.lines}'
+
+
+class DigestRun(models.Model):
+    period_start = models.DateTimeField(verbose_name='Начало периода')
+    period_end = models.DateTimeField(verbose_name='Конец периода')
+    last_user_id = models.IntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0, verbose_name='Отправлено')
+    finished = models.BooleanField(default=False, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('-period_end',)
+        verbose_name = 'Рассылка дайджеста'
+        verbose_name_plural = 'Рассылки дайджестов'
+
+    def __str__(self):
+        return f'{self.period_start:%Y-%m-%d %H:%M} — {self.period_end:%H:%M}'
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    POST = 'post'
+    KINDS = (
+        (COMMENT, 'Новый комментарий'),
+        (FOLLOW, 'Новый подписчик'),
+        (POST, 'Новая запись автора'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события',)
+    kind = models.CharField(
+        max_length=10,
+        choices=KINDS,
+        verbose_name='Тип')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True)
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True)
+    is_read = models.BooleanField(default=False, verbose_name='Прочитано')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('user', '-created'),
+                name='notification_user_created_idx'
+            ),
+        )
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.user_id}'
+
+
+class Reaction(models.Model):
+    LIKE = 'like'
+    LOVE = 'love'
+    LAUGH = 'laugh'
+    SAD = 'sad'
+    KINDS = (
+        (LIKE, '👍'),
+        (LOVE, '❤️'),
+        (LAUGH, '😂'),
+        (SAD, '😢'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь',)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Запись',)
+    kind = models.CharField(
+        max_length=10,
+        choices=KINDS,
+        verbose_name='Реакция')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Дата')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='reaction_user_post_uniq'
+            ),
+        )
+        verbose_name = 'Реакция'
+        verbose_name_plural = 'Реакции'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.user_id} → {self.post_id}'
+
+
+class ReactionCount(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reaction_counts',
+        verbose_name='Запись',)
+    kind = models.CharField(
+        max_length=10,
+        choices=Reaction.KINDS,
+        verbose_name='Реакция')
+    count = models.IntegerField(default=0, verbose_name='Количество')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'kind'),
+                name='reaction_count_post_kind_uniq'
+            ),
+        )
+        verbose_name = 'Счётчик реакций'
+        verbose_name_plural = 'Счётчики реакций'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.post_id}: {self.count}'
+
+
+class TrendingState(models.Model):
+    epoch = models.DateTimeField(verbose_name='Начало отсчёта весов')
+    last_comment_id = models.IntegerField(default=0)
+    last_reaction_id = models.IntegerField(default=0)
+    last_follow_id = models.IntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Популярное на {self.updated:%Y-%m-%d %H:%M}'
+
+
+class PostScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+')
+    score = models.FloatField(default=0)
+
+
+class TrendingPost(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Группа',)
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Запись',)
+    score = models.FloatField(verbose_name='Рейтинг')
+
+    class Meta:
+        ordering = ('rank',)
+        indexes = (
+            models.Index(
+                fields=('group', 'rank'),
+                name='trending_group_rank_idx'
+            ),
+        )
+        verbose_name = 'Популярная запись'
+        verbose_name_plural = 'Популярные записи'
+
+    def __str__(self):
+        return f'{self.rank}. {self.post_id}'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',)
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ('rank',)
+        indexes = (
+            models.Index(
+                fields=('user', 'rank'),
+                name='suggestion_user_rank_idx'
+            ),
+        )
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+
+    def __str__(self):
+        return f'{self.author_id} для {self.user_id}'
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+
+from .bulk import BATCH_SIZE, batched, bulk_create
+from .models import Follow, Notification
+from .versions import bump_versions
+
+UNREAD_TIMEOUT: int = 60 * 60
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений из кэша.
+
+    COUNT выполняется только при промахе; таймаут ключа ограничивает,
+    как долго счётчик может расходиться с базой.
+    """
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, is_read=False
+        ).count()
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def change_unread(user_ids, delta):
+    """Меняет закэшированные счётчики; отсутствующие пересчитаются сами."""
+    bump_versions(*(f'viewer:{user_id}' for user_id in user_ids))
+    for user_id in user_ids:
+        key = unread_key(user_id)
+        try:
+            if cache.incr(key, delta) < 0:
+                cache.delete(key)
+        except ValueError:
+            pass
+
+
+def notify(user_ids, actor_id, kind, post_id=None, comment_id=None):
+    user_ids = (user_id for user_id in user_ids if user_id != actor_id)
+    for batch in batched(user_ids, BATCH_SIZE):
+        bulk_create(Notification, [
+            Notification(
+                user_id=user_id,
+                actor_id=actor_id,
+                kind=kind,
+                post_id=post_id,
+                comment_id=comment_id,
+            )
+            for user_id in batch
+        ])
+        change_unread(batch, 1)
+
+
+def notify_followers(post):
+    """Рассылает уведомление о посте подписчикам автора.
+
+    Уже уведомлённые пропускаются, поэтому повтор задачи после сбоя
+    не создаёт дубликатов.
+    """
+    notified = Notification.objects.filter(
+        post_id=post.pk, kind=Notification.POST
+    ).values('user_id')
+    followers = Follow.objects.filter(author_id=post.author_id).exclude(
+        user_id__in=notified
+    ).order_by('user_id').values_list('user_id', flat=True)
+    last_id = 0
+    while True:
+        batch = list(followers.filter(user_id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        notify(batch, post.author_id, Notification.POST, post.pk)
+        last_id = batch[-1]
+
+
+def mark_read(user_id, notification_ids):
+    updated = Notification.objects.filter(
+        user_id=user_id, id__in=notification_ids, is_read=False
+    ).update(is_read=True)
+    if updated:
+        change_unread([user_id], -updated)
+    return updated
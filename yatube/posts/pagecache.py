@@ -0,0 +1,153 @@
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import (
+    get_cache_key, learn_cache_key, patch_response_headers
+)
+
+STALE_TIME: int = 60
+LOCK_TIMEOUT: int = 30
+LOCK_WAIT: float = 5.0
+POLL_INTERVAL: float = 0.05
+EARLY_REFRESH_BETA: float = 1.0
+HEADERS_TIMEOUT: int = 24 * 60 * 60
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def store(key, value, timeout, delta):
+    """Кладёт значение со сроком свежести и временем его расчёта.
+
+    Запись живёт на STALE_TIME дольше срока свежести: пока один
+    воркер пересчитывает значение, остальные отдают прежнее.
+    """
+    cache.set(
+        key, (value, time.time() + timeout, delta), timeout + STALE_TIME
+    )
+
+
+def recompute(key, compute, timeout, cacheable):
+    started = time.time()
+    value = compute()
+    if cacheable(value):
+        store(key, value, timeout, time.time() - started)
+    return value
+
+
+def refresh_due(expires, delta):
+    """Вероятностное раннее обновление (XFetch).
+
+    Чем ближе конец срока и чем дольше расчёт, тем вероятнее, что
+    запрос обновит значение заранее, до того как оно протухнет
+    у всех одновременно.
+    """
+    early = -delta * EARLY_REFRESH_BETA * math.log(1 - random.random())
+    return time.time() + early >= expires
+
+
+def single_flight(key, compute, timeout, cacheable=lambda value: True):
+    """Значение из кэша, которое пересчитывает только один воркер.
+
+    Пересчёт идёт под блокировкой cache.add: если устаревшее значение
+    ещё есть, остальные сразу отдают его; если нет ничего, они ждут
+    до LOCK_WAIT, пока значение появится, а затем считают сами.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not refresh_due(expires, delta):
+            return value
+    token = uuid.uuid4().hex
+    if cache.add(lock_key(key), token, LOCK_TIMEOUT):
+        try:
+            return recompute(key, compute, timeout, cacheable)
+        finally:
+            if cache.get(lock_key(key)) == token:
+                cache.delete(lock_key(key))
+    if entry is not None:
+        return entry[0]
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key(key)) is None:
+            break
+    return recompute(key, compute, timeout, cacheable)
+
+
+def cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+def versioned_key(key, request):
+    """Ключ страницы с версиями её данных из conditional_page.
+
+    Без версий в ключе новый ETag отдавался бы вместе со старым телом,
+    и клиент закрепил бы устаревшую страницу ответами 304.
+    """
+    stamps = getattr(request, 'page_stamps', None)
+    if not stamps:
+        return key
+    return f'{key}:{",".join(map(str, stamps))}'
+
+
+def page_cache(timeout, key_prefix):
+    """cache_page с защитой от одновременного пересчёта страницы.
+
+    Ключ строится, как в CacheMiddleware, с учётом заголовков Vary и
+    версий данных страницы; список заголовков живёт HEADERS_TIMEOUT,
+    поэтому после первого ответа ключ известен заранее и пересчёт идёт
+    через single_flight. Кэшируются только страницы анонимных
+    посетителей: декоратор работает внутри SessionMiddleware, и Vary:
+    Cookie в ключ не попадает, так что страница одного пользователя
+    досталась бы другому.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+
+            def render():
+                response = view(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+                if cacheable_response(response):
+                    patch_response_headers(response, timeout)
+                return response
+
+            key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+            if key is not None:
+                return single_flight(
+                    versioned_key(key, request), render, timeout,
+                    cacheable_response
+                )
+            started = time.time()
+            response = render()
+            if cacheable_response(response):
+                key = learn_cache_key(
+                    request, response, HEADERS_TIMEOUT, key_prefix,
+                    cache=cache
+                )
+                store(
+                    versioned_key(key, request), response, timeout,
+                    time.time() - started
+                )
+            return response
+        return wrapper
+    return decorator
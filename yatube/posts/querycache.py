@@ -0,0 +1,217 @@
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import QuerySet
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .versions import bump_versions, get_versions
+
+CACHED_TABLES = frozenset((
+    'posts_post',
+    'posts_group',
+    'posts_comment',
+    'posts_follow',
+    'auth_user',
+))
+UNTRACKED_COLUMNS = {
+    'auth_user': frozenset(('last_login',)),
+}
+QUERY_CACHE_TIMEOUT: int = 5 * 60
+QUERY_PREFIX = 'query'
+
+WRITE_RE = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?',
+    re.IGNORECASE
+)
+IDENTIFIER_RE = re.compile(r'"(\w+)"')
+SET_RE = re.compile(r'\bSET\s+(.*?)\s+WHERE\b', re.IGNORECASE | re.DOTALL)
+ASSIGNED_RE = re.compile(r'"(\w+)"\s*=')
+
+_local = threading.local()
+
+
+def table_scope(table):
+    return f'table:{table}'
+
+
+def bump_tables(*tables):
+    if tables:
+        bump_versions(*(table_scope(table) for table in tables))
+
+
+def untracked_update(table, sql):
+    """UPDATE, меняющий только столбцы из UNTRACKED_COLUMNS.
+
+    Так update_last_login при каждом входе не сбрасывает все
+    закэшированные запросы с auth_user.
+    """
+    columns = UNTRACKED_COLUMNS.get(table)
+    if not columns or not sql.lstrip()[:6].upper() == 'UPDATE':
+        return False
+    match = SET_RE.search(sql)
+    if match is None:
+        return False
+    assigned = set(ASSIGNED_RE.findall(match.group(1)))
+    return bool(assigned) and assigned <= columns
+
+
+def pending_tables(connection):
+    """Таблицы, изменённые в текущей транзакции соединения.
+
+    Берутся из отложенных до коммита обработчиков: при откате Django
+    их отбрасывает, поэтому набор не переживает транзакцию.
+    """
+    if not connection.in_atomic_block:
+        return set()
+    return {
+        func.table for _, func in connection.run_on_commit
+        if isinstance(func, TableBump)
+    }
+
+
+class TableBump:
+    """Отложенная до коммита смена версии таблицы."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __call__(self):
+        bump_tables(self.table)
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper: меняет версию таблицы после записи в неё.
+
+    Ловит любые INSERT, UPDATE и DELETE, включая update() и
+    bulk_create в обход сигналов, кроме UPDATE только служебных
+    столбцов из UNTRACKED_COLUMNS. Внутри транзакции версия меняется
+    только после коммита: до него другие процессы видят старые
+    данные и не должны закэшировать их под новой версией.
+    """
+    result = execute(sql, params, many, context)
+    match = WRITE_RE.match(sql)
+    if match is None or getattr(_local, 'untracked', False):
+        return result
+    table = match.group(1)
+    if table not in CACHED_TABLES or untracked_update(table, sql):
+        return result
+    connection = context['connection']
+    if not connection.in_atomic_block:
+        bump_tables(table)
+        return result
+    savepoints = set(connection.savepoint_ids)
+    for registered, func in connection.run_on_commit:
+        if (
+            isinstance(func, TableBump) and func.table == table
+            and registered == savepoints
+        ):
+            return result
+    transaction.on_commit(TableBump(table), using=connection.alias)
+    return result
+
+
+@receiver(connection_created)
+def install_write_tracking(sender, connection, **kwargs):
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+@contextmanager
+def untracked_writes():
+    """Записи, после которых версии таблиц не меняются.
+
+    Для приблизительных счётчиков: сброс просмотров раз в несколько
+    секунд иначе сбрасывал бы весь кэш запросов к постам.
+    """
+    previous = getattr(_local, 'untracked', False)
+    _local.untracked = True
+    try:
+        yield
+    finally:
+        _local.untracked = previous
+
+
+@lru_cache(maxsize=None)
+def known_tables():
+    return {model._meta.db_table for model in apps.get_models()}
+
+
+def query_key(queryset, kind):
+    """Ключ кэша по SQL запроса и версиям всех его таблиц.
+
+    Возвращает None, если запрос нельзя кэшировать: это не QuerySet,
+    запрос заведомо пуст, читает таблицу без счётчика версий или
+    таблицу, изменённую в текущей транзакции.
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    connection = connections[queryset.db or DEFAULT_DB_ALIAS]
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    tables = set(IDENTIFIER_RE.findall(sql)) & known_tables()
+    if not tables or not tables <= CACHED_TABLES:
+        return None
+    if tables & pending_tables(connection):
+        return None
+    tables = sorted(tables)
+    stamps = get_versions(*(table_scope(table) for table in tables))
+    source = '|'.join((kind, sql, repr(params), repr(stamps)))
+    return f'{QUERY_PREFIX}:{hashlib.md5(source.encode()).hexdigest()}'
+
+
+def cached_result(queryset, kind, evaluate, timeout):
+    key = query_key(queryset, kind)
+    if key is None:
+        return evaluate(queryset)
+    result = cache.get(key)
+    if result is None:
+        result = evaluate(queryset)
+        cache.set(key, result, timeout)
+    return result
+
+
+def cached_query(queryset, timeout=QUERY_CACHE_TIMEOUT):
+    """Строки queryset списком — из кэша, пока его таблицы не менялись."""
+    return cached_result(queryset, 'rows', list, timeout)
+
+
+def cached_count(queryset, timeout=QUERY_CACHE_TIMEOUT):
+    return cached_result(
+        queryset, 'count',
+        lambda rows: rows.count() if isinstance(rows, QuerySet) else len(rows),
+        timeout
+    )
+
+
+def get_cached_or_404(model, **lookup):
+    """get_object_or_404 через кэш запросов."""
+    rows = cached_query(model._default_manager.filter(**lookup)[:2])
+    if not rows:
+        raise Http404(f'{model._meta.object_name} не найден')
+    if len(rows) > 1:
+        raise model.MultipleObjectsReturned
+    return rows[0]
+
+
+class CachedPaginator(Paginator):
+    """Paginator, берущий число строк и страницы из кэша запросов."""
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return super()._get_page(cached_query(object_list), *args, **kwargs)
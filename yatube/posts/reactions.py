@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .bulk import bulk_create
+from .counters import CounterBuffer, increment_by
+from .models import Post, Reaction, ReactionCount
+from .signals import post_scopes
+from .versions import bump_versions
+
+
+def flush_reaction_counts(deltas):
+    """Записывает накопленные приращения (post_id, kind) -> n.
+
+    Недостающие строки счётчиков создаются одной вставкой, затем на
+    каждый вид реакции выполняется один UPDATE count = count + n.
+    Приращения удалённых постов отбрасываются.
+    """
+    posts = Post.objects.filter(
+        id__in={post_id for post_id, _ in deltas}
+    ).only('author_id', 'group_id').order_by()
+    posts = {post.pk: post for post in posts}
+    by_kind = defaultdict(dict)
+    for (post_id, kind), delta in deltas.items():
+        if post_id in posts:
+            by_kind[kind][post_id] = delta
+    with transaction.atomic():
+        bulk_create(ReactionCount, [
+            ReactionCount(post_id=post_id, kind=kind)
+            for kind, post_deltas in by_kind.items()
+            for post_id in post_deltas
+        ], ignore_conflicts=True)
+        for kind, post_deltas in by_kind.items():
+            increment_by(
+                ReactionCount.objects.filter(kind=kind),
+                'post_id', 'count', post_deltas
+            )
+    bump_versions(*{
+        scope for post in posts.values() for scope in post_scopes(post)
+    })
+
+
+reaction_counts = CounterBuffer(flush_reaction_counts)
+
+
+def react(user_id, post_id, kind):
+    """Ставит, меняет или снимает реакцию пользователя на пост.
+
+    Повторная та же реакция снимает её. Возвращает текущую реакцию
+    или None. Счётчики меняются через буфер, а не UPDATE на каждый
+    клик.
+    """
+    deltas = []
+    with transaction.atomic():
+        previous = Reaction.objects.select_for_update().filter(
+            user_id=user_id, post_id=post_id
+        ).first()
+        if previous is None:
+            try:
+                with transaction.atomic():
+                    Reaction.objects.create(
+                        user_id=user_id, post_id=post_id, kind=kind
+                    )
+            except IntegrityError:
+                return None
+            deltas.append((kind, 1))
+        elif previous.kind == kind:
+            previous.delete()
+            deltas.append((kind, -1))
+            kind = None
+        else:
+            Reaction.objects.filter(pk=previous.pk).update(kind=kind)
+            deltas.extend(((previous.kind, -1), (kind, 1)))
+    for changed, delta in deltas:
+        reaction_counts.add((post_id, changed), delta)
+    bump_versions(f'viewer:{user_id}')
+    return kind
+
+
+def attach_reactions(posts):
+    """Добавляет постам reaction_summary одним запросом на страницу.
+
+    reaction_summary — список (вид, значок, число) для всех видов
+    реакций в порядке Reaction.KINDS, включая нулевые.
+    """
+    posts = list(posts)
+    counts = defaultdict(dict)
+    for post_id, kind, count in ReactionCount.objects.filter(
+        post_id__in=[post.pk for post in posts], count__gt=0
+    ).values_list('post_id', 'kind', 'count'):
+        counts[post_id][kind] = count
+    for post in posts:
+        post.reaction_summary = [
+            (kind, label, counts[post.pk].get(kind, 0))
+            for kind, label in Reaction.KINDS
+        ]
+    return posts
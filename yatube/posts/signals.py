@@ -0,0 +1,185 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+from .archive import count_post
+from .graph import follow_edge_changed
+from .groupstats import count_group_post, refresh_group_stats
+from .models import (
+    Comment, Follow, Group, GroupFollow, GroupStats, Notification, Post, User
+)
+from .notifications import notify
+from .versions import bump_versions, forget_lookup
+
+
+def post_scopes(post):
+    scopes = ['posts', f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id:
+        scopes.append(f'group:{post.group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    scopes = post_scopes(instance)
+    previous = getattr(instance, '_previous_group_id', None)
+    if previous and previous != instance.group_id:
+        scopes.append(f'group:{previous}')
+    bump_versions(*scopes)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_versions(*post_scopes(instance))
+    forget_lookup('post-author', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def group_post_saved(sender, instance, created, **kwargs):
+    if created:
+        if instance.group_id:
+            count_group_post(instance)
+        return
+    previous = getattr(instance, '_previous_group_id', None)
+    if previous != instance.group_id:
+        refresh_group_stats(
+            [group_id for group_id in (previous, instance.group_id)
+             if group_id]
+        )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    if instance.group_id:
+        refresh_group_stats([instance.group_id])
+
+
+@receiver(post_save, sender=Post)
+def archive_post_saved(sender, instance, created, **kwargs):
+    if created:
+        count_post(instance.author_id, instance.group_id, instance.pub_date)
+        return
+    previous = getattr(instance, '_previous_group_id', None)
+    if previous != instance.group_id:
+        for group_id, delta in ((previous, -1), (instance.group_id, 1)):
+            if group_id:
+                count_post(
+                    instance.author_id, group_id, instance.pub_date, delta,
+                    scopes=[f'group:{group_id}']
+                )
+
+
+@receiver(post_delete, sender=Post)
+def archive_post_deleted(sender, instance, **kwargs):
+    count_post(instance.author_id, instance.group_id, instance.pub_date, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_versions(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Comment)
+def count_reply(sender, instance, created, **kwargs):
+    if created and instance.parent_id:
+        Comment.objects.filter(pk=instance.parent_id).update(
+            replies_count=F('replies_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_reply(sender, instance, **kwargs):
+    if instance.parent_id:
+        Comment.objects.filter(
+            pk=instance.parent_id, replies_count__gt=0
+        ).update(replies_count=F('replies_count') - 1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(post_save, sender=GroupFollow)
+@receiver(post_delete, sender=GroupFollow)
+def follow_changed(sender, instance, **kwargs):
+    scopes = [f'follow:{instance.user_id}']
+    if sender is Follow:
+        scopes += [
+            f'author:{instance.author_id}', f'author:{instance.user_id}'
+        ]
+    bump_versions(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(
+            follow_edge_changed, instance.user_id, instance.author_id, True
+        ))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        follow_edge_changed, instance.user_id, instance.author_id, False
+    ))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_versions(f'group:{instance.pk}', 'groups')
+    forget_lookup('group', instance.slug)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    bump_versions(f'author:{instance.pk}')
+    forget_lookup('user', instance.username)
+
+
+@receiver(post_save, sender=Post)
+def notify_about_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(
+            'posts.notify_followers',
+            {'post_id': instance.pk},
+            dedup_key=f'notify-followers:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Comment)
+def notify_about_comment(sender, instance, created, **kwargs):
+    if created:
+        notify(
+            [instance.post.author_id],
+            instance.author_id,
+            Notification.COMMENT,
+            instance.post_id,
+            instance.pk,
+        )
+
+
+@receiver(post_save, sender=Follow)
+def notify_about_follow(sender, instance, created, **kwargs):
+    if created:
+        notify([instance.author_id], instance.user_id, Notification.FOLLOW)
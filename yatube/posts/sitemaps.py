@@ -0,0 +1,123 @@
+import glob
+import hashlib
+import os
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.urls import reverse
+
+from core.jobs import enqueue
+from .models import Post
+
+SHARD_SIZE: int = 50000
+STREAM_CHUNK: int = 2000
+UPDATE_INTERVAL: int = 24 * 60 * 60
+INDEX_NAME = 'sitemap.xml'
+SHARD_PATTERN = 'sitemap-posts-*.xml'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def shard_name(number):
+    return SHARD_PATTERN.replace('*', str(number))
+
+
+def write_file(path, chunks):
+    """Пишет файл атомарно и только если содержимое изменилось.
+
+    Строки пишутся во временный файл по мере генерации. Неизменённый
+    файл сохраняет дату изменения, поэтому ETag и Last-Modified
+    не меняются, и краулеры получают 304.
+    """
+    temporary = f'{path}.tmp'
+    digest = hashlib.md5()
+    with open(temporary, 'w', encoding='utf-8') as output:
+        for chunk in chunks:
+            output.write(chunk)
+            digest.update(chunk.encode())
+    if os.path.exists(path):
+        existing = hashlib.md5()
+        with open(path, 'rb') as current:
+            for block in iter(lambda: current.read(1 << 16), b''):
+                existing.update(block)
+        if existing.digest() == digest.digest():
+            os.remove(temporary)
+            return False
+    os.replace(temporary, path)
+    return True
+
+
+def shard_urls(base_url, after_id, size, stats):
+    """Строки <url> для size постов с id больше after_id.
+
+    Граница шарда — keyset по id: строки читаются одним запросом
+    по первичному ключу потоком через iterator(), без OFFSET.
+    """
+    rows = Post.objects.filter(pk__gt=after_id).order_by('pk').values_list(
+        'id', 'pub_date'
+    )[:size]
+    for pk, pub_date in rows.iterator(chunk_size=STREAM_CHUNK):
+        stats['count'] += 1
+        stats['last_id'] = pk
+        if stats['lastmod'] is None or pub_date > stats['lastmod']:
+            stats['lastmod'] = pub_date
+        loc = escape(base_url + reverse('posts:post_detail', args=(pk,)))
+        yield (
+            f'<url><loc>{loc}</loc>'
+            f'<lastmod>{pub_date.date().isoformat()}</lastmod></url>\n'
+        )
+
+
+def build_sitemaps(base_url=None, root=None, shard_size=SHARD_SIZE):
+    """Пишет шарды карты сайта со всеми post_detail и индекс к ним.
+
+    Возвращает число шардов и адресов. Шарды, оставшиеся от прошлой
+    сборки за последним, удаляются.
+    """
+    base_url = (base_url or settings.SITE_URL).rstrip('/')
+    root = root or settings.SITEMAP_ROOT
+    os.makedirs(root, exist_ok=True)
+    shards, total, after_id = [], 0, 0
+    while True:
+        stats = {'count': 0, 'last_id': after_id, 'lastmod': None}
+        path = os.path.join(root, shard_name(len(shards) + 1))
+        lines = shard_urls(base_url, after_id, shard_size, stats)
+        first = next(lines, None)
+        if first is None:
+            break
+        write_file(path, chain(
+            (XML_HEADER, f'<urlset xmlns="{XMLNS}">\n', first),
+            lines,
+            ('</urlset>\n',),
+        ))
+        shards.append((path, stats['lastmod']))
+        total += stats['count']
+        after_id = stats['last_id']
+        if stats['count'] < shard_size:
+            break
+    kept = {path for path, _ in shards}
+    for path in glob.glob(os.path.join(root, SHARD_PATTERN)):
+        if path not in kept:
+            os.remove(path)
+    entries = (
+        '<sitemap><loc>{}</loc><lastmod>{}</lastmod></sitemap>\n'.format(
+            escape(base_url + reverse(
+                'posts:sitemap_shard', args=(number,)
+            )),
+            lastmod.isoformat(),
+        )
+        for number, (_, lastmod) in enumerate(shards, start=1)
+    )
+    write_file(os.path.join(root, INDEX_NAME), chain(
+        (XML_HEADER, f'<sitemapindex xmlns="{XMLNS}">\n'),
+        entries,
+        ('</sitemapindex>\n',),
+    ))
+    return len(shards), total
+
+
+def schedule_sitemaps(delay=UPDATE_INTERVAL):
+    return enqueue(
+        'posts.build_sitemaps', dedup_key='build-sitemaps', delay=delay
+    )
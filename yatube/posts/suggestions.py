@@ -0,0 +1,133 @@
+import heapq
+import math
+from array import array
+
+from django.db import transaction
+
+from core.jobs import enqueue
+from .bulk import BATCH_SIZE, batched, bulk_create
+from .graph import FollowGraph, follow_graph
+from .models import FollowSuggestion
+from .versions import bump_versions
+
+SUGGESTIONS_PER_USER: int = 10
+SUGGESTIONS_SHOWN: int = 5
+UPDATE_INTERVAL: int = 24 * 60 * 60
+
+
+def co_follow_scores(graph, row, accumulator, touched):
+    """Строка произведения A·A матрицы подписок для позиции row.
+
+    Разреженное умножение по строкам с плотным накопителем: каждый
+    автор, на которого подписан пользователь, добавляет своим авторам
+    вес 1 / log(2 + число его подписок) — подписки «всеядных»
+    пользователей значат меньше. Возвращает позиции кандидатов;
+    накопитель обнуляет вызывающий.
+    """
+    following, ptr = graph.following, graph.following_ptr
+    for middle in following[ptr[row]:ptr[row + 1]]:
+        start, end = ptr[middle], ptr[middle + 1]
+        if start == end:
+            continue
+        weight = 1 / math.log(2 + end - start)
+        for candidate in following[start:end]:
+            if not accumulator[candidate]:
+                touched.append(candidate)
+            accumulator[candidate] += weight
+    return touched
+
+
+def top_suggestions(graph, row, accumulator, popular,
+                    size=SUGGESTIONS_PER_USER):
+    """Лучшие кандидаты для позиции row: (позиция, оценка).
+
+    Если соседей второго уровня не хватает, список добирается самыми
+    популярными авторами с нулевой оценкой.
+    """
+    touched = co_follow_scores(graph, row, accumulator, [])
+    excluded = set(graph.following[
+        graph.following_ptr[row]:graph.following_ptr[row + 1]
+    ])
+    excluded.add(row)
+    best = heapq.nlargest(
+        size,
+        (
+            (accumulator[candidate], -candidate)
+            for candidate in touched if candidate not in excluded
+        ),
+    )
+    for candidate in touched:
+        accumulator[candidate] = 0
+    result = [(-candidate, score) for score, candidate in best]
+    chosen = {candidate for candidate, _ in result}
+    for candidate in popular:
+        if len(result) >= size:
+            break
+        if candidate not in excluded and candidate not in chosen:
+            result.append((candidate, 0.0))
+    return result
+
+
+def update_suggestions(batch_size=BATCH_SIZE):
+    """Пересчитывает рекомендации подписок для всех подписчиков.
+
+    Граф загружается в память одним запросом, рекомендации пишутся
+    пачками: на каждую пачку пользователей одна транзакция.
+    Возвращает число пользователей с рекомендациями.
+    """
+    graph = FollowGraph.load()
+    accumulator = array('d', [0.0]) * len(graph)
+    popular = heapq.nlargest(
+        SUGGESTIONS_PER_USER * 2,
+        range(len(graph)),
+        key=lambda position: graph.followers_ptr[position + 1]
+        - graph.followers_ptr[position],
+    )
+    rows = (
+        row for row in range(len(graph))
+        if graph.following_ptr[row + 1] > graph.following_ptr[row]
+    )
+    updated = 0
+    for batch in batched(rows, batch_size):
+        user_ids = [graph.nodes[row] for row in batch]
+        suggestions = [
+            FollowSuggestion(
+                user_id=graph.nodes[row],
+                author_id=graph.nodes[candidate],
+                rank=rank,
+                score=score,
+            )
+            for row in batch
+            for rank, (candidate, score) in enumerate(
+                top_suggestions(graph, row, accumulator, popular), start=1
+            )
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+            bulk_create(FollowSuggestion, suggestions)
+        bump_versions(*(f'viewer:{user_id}' for user_id in user_ids))
+        updated += len(user_ids)
+    return updated
+
+
+def schedule_suggestions(delay=UPDATE_INTERVAL):
+    return enqueue(
+        'posts.update_suggestions',
+        dedup_key='update-suggestions',
+        delay=delay
+    )
+
+
+def suggestions_for(user, size=SUGGESTIONS_SHOWN):
+    """Готовые рекомендации без авторов, на которых уже подписан user.
+
+    Свежие подписки отсеиваются по графу в памяти, без запроса к Follow.
+    """
+    graph = follow_graph()
+    return [
+        suggestion
+        for suggestion in FollowSuggestion.objects.filter(
+            user=user
+        ).select_related('author')
+        if not graph.is_following(user.pk, suggestion.author_id)
+    ][:size]
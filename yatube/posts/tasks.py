@@ -0,0 +1,62 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.jobs import task
+from .digests import send_digests
+from .models import Post
+from .notifications import notify_followers
+from .groupstats import refresh_group_stats, schedule_group_stats
+from .sitemaps import build_sitemaps, schedule_sitemaps
+from .suggestions import schedule_suggestions, update_suggestions
+from .trending import schedule_trending, update_trending
+
+THUMBNAILS = (
+    ('960x339', {'crop': 'center'}),
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+@task('posts.make_thumbnails')
+def make_thumbnails(post_id):
+    image = Post.objects.filter(pk=post_id).values_list(
+        'image', flat=True
+    ).first()
+    if not image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(image, geometry, **options)
+
+
+@task('posts.send_digests', max_attempts=3)
+def send_follower_digests():
+    send_digests()
+
+
+@task('posts.notify_followers')
+def notify_post_followers(post_id):
+    post = Post.objects.filter(pk=post_id).only('author_id').first()
+    if post is not None:
+        notify_followers(post)
+
+
+@task('posts.update_trending', max_attempts=3)
+def refresh_trending():
+    schedule_trending()
+    update_trending()
+
+
+@task('posts.update_suggestions', max_attempts=3)
+def refresh_suggestions():
+    schedule_suggestions()
+    update_suggestions()
+
+
+@task('posts.update_group_stats', max_attempts=3)
+def recount_group_stats():
+    schedule_group_stats()
+    refresh_group_stats()
+
+
+@task('posts.build_sitemaps', max_attempts=3)
+def rebuild_sitemaps():
+    schedule_sitemaps()
+    build_sitemaps()
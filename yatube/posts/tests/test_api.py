@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from ..utils import POSTS_PER_PAGE
+
+User = get_user_model()
+
+TEST_POSTS_CREATED = 13
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+            for number in range(TEST_POSTS_CREATED)
+        ]
+        cls.post = cls.posts[-1]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_use_cursor_pagination(self):
+        """Ленты отдаются страницами по курсору без пропусков и повторов"""
+        urls = [
+            reverse('posts:api_index'),
+            reverse('posts:api_group_posts', args=(self.group.slug,)),
+            reverse('posts:api_profile', args=(self.user.username,)),
+        ]
+        expected = [post.id for post in reversed(self.posts)]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                self.assertEqual(len(first['results']), POSTS_PER_PAGE)
+                second = self.client.get(first['next']).json()
+                self.assertIsNone(second['next'])
+                ids = [
+                    row['id'] for row in first['results'] + second['results']
+                ]
+                self.assertEqual(ids, expected)
+
+    def test_sparse_fields(self):
+        """В ответ попадают только запрошенные поля"""
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'text,author'}
+        )
+        row = response.json()['results'][0]
+        self.assertEqual(row, {'text': self.post.text, 'author': 'author'})
+        response = self.client.get(
+            reverse('posts:api_index'), {'fields': 'password'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304"""
+        url = reverse('posts:api_post_detail', args=(self.post.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.json()['group'], self.group.slug)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_follow_feed(self):
+        """Лента подписок требует авторизации и содержит посты авторов"""
+        url = reverse('posts:api_follow_index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(self.reader_client.get(url).json()['results'], [])
+        Follow.objects.create(user=self.reader, author=self.user)
+        results = self.reader_client.get(url).json()['results']
+        self.assertEqual(results[0]['id'], self.post.id)
+
+    def test_comments_oldest_first(self):
+        response = self.client.get(
+            reverse('posts:api_post_comments', args=(self.post.id,)),
+            {'fields': 'text', 'limit': 2}
+        )
+        data = response.json()
+        self.assertEqual(
+            data['results'],
+            [{'text': 'Комментарий 0'}, {'text': 'Комментарий 1'}]
+        )
+        self.assertIsNotNone(data['next'])
+
+    def test_errors(self):
+        responses = {
+            reverse('posts:api_group_posts', args=('missing',)):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_post_detail', args=(0,)):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_index') + '?cursor=broken':
+                HTTPStatus.BAD_REQUEST,
+        }
+        for url, status in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, status)
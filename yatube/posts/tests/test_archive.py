@@ -0,0 +1,133 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, MonthlyPostCount, Post
+from ..archive import period_bounds, rebuild_archive
+from ..utils import POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+def moment(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.client = Client()
+
+    def post(self, when, group=None, text='Пост'):
+        post = Post.objects.create(author=self.author, text=text, group=group)
+        Post.objects.filter(pk=post.pk).update(pub_date=when)
+        rebuild_archive()
+        return post
+
+    def counts(self):
+        return dict(
+            ((row.scope, row.month.isoformat()), row.count)
+            for row in MonthlyPostCount.objects.exclude(count=0)
+        )
+
+    def test_period_bounds(self):
+        """Границы периода — полуоткрытый интервал"""
+        self.assertEqual(
+            period_bounds(2026, 12), (moment(2026, 12, 1), moment(2027, 1, 1))
+        )
+        self.assertEqual(
+            period_bounds(2024, 2, 29),
+            (moment(2024, 2, 29), moment(2024, 3, 1))
+        )
+        for args in ((2026, 13), (9999, 12), (99999999999,), (0,)):
+            with self.subTest(args=args):
+                with self.assertRaises(ValueError):
+                    period_bounds(*args)
+
+    def test_rollup_follows_posts(self):
+        """Сводка меняется вместе с записями и совпадает с пересчётом"""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        other = Post.objects.create(author=self.author, text='Второй')
+        month = timezone.localtime(post.pub_date).date().replace(day=1)
+        key = month.isoformat()
+        self.assertEqual(self.counts(), {
+            ('posts', key): 2,
+            (f'author:{self.author.pk}', key): 2,
+            (f'group:{self.group.pk}', key): 1,
+        })
+        other.group = self.group
+        other.save()
+        post.delete()
+        incremental = self.counts()
+        rebuild_archive()
+        self.assertEqual(incremental, self.counts())
+        self.assertEqual(incremental[(f'group:{self.group.pk}', key)], 1)
+
+    def test_month_page(self):
+        """Страница месяца берёт записи по интервалу дат с курсором"""
+        self.post(moment(2026, 9, 30, 23, 59), text='Сентябрь')
+        for day in range(POSTS_PER_PAGE + 1):
+            self.post(moment(2026, 10, day + 1), self.group, 'Октябрь')
+        self.post(moment(2026, 11, 1), text='Ноябрь')
+        url = reverse('posts:profile_archive', args=('author', 2026, 10))
+        response = self.client.get(url)
+        posts = response.context['posts']
+        self.assertEqual(len(posts), POSTS_PER_PAGE)
+        self.assertEqual({post.text for post in posts}, {'Октябрь'})
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [post.pub_date for post in response.context['posts']],
+            [moment(2026, 10, 1)]
+        )
+        self.assertEqual(
+            [(row.month.month, row.count)
+             for row in response.context['months']],
+            [(11, 1), (10, POSTS_PER_PAGE + 1), (9, 1)]
+        )
+        self.assertContains(
+            response,
+            reverse('posts:profile_archive', args=('author', 2026, 9))
+        )
+        response = self.client.get(
+            reverse('posts:group_archive', args=('group', 2026, 10, 5))
+        )
+        self.assertEqual(len(response.context['posts']), 1)
+        response = self.client.get(reverse('posts:archive', args=(2026,)))
+        self.assertEqual(len(response.context['posts']), POSTS_PER_PAGE)
+
+    def test_bad_dates(self):
+        """Несуществующая дата и чужой slug — 404"""
+        for url in (
+            reverse('posts:archive', args=(2026, 2, 30)),
+            reverse('posts:archive', args=(2026, 13)),
+            reverse('posts:archive', args=(99999999999,)),
+            reverse('posts:archive', args=(9999, 12, 31)),
+            reverse('posts:group_archive', args=('missing', 2026)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_range_uses_index(self):
+        """Архив автора читается по составному индексу"""
+        start, end = period_bounds(2026, 10)
+        queryset = Post.objects.filter(
+            author=self.author, pub_date__gte=start, pub_date__lt=end
+        ).order_by('-pub_date', '-id')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('post_author_pub_date_idx', plan)
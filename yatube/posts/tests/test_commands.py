@@ -0,0 +1,279 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, DigestRun, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SeedCommandTest(TestCase):
+    options = {
+        'users': 10,
+        'groups': 3,
+        'posts': 40,
+        'comments': 30,
+        'follows': 20,
+        'seed': 7,
+        'until': '2026-10-01',
+        'batch_size': 7,
+        'transaction_size': 15,
+    }
+
+    def seed(self):
+        call_command('seed', stdout=StringIO(), **self.options)
+        return list(
+            Post.objects.order_by('id').values_list('text', 'pub_date')
+        )
+
+    def test_seed_creates_rows(self):
+        """Команда seed создаёт заданное количество записей"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 20)
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists()
+        )
+
+    def test_seed_keeps_generated_dates(self):
+        """Даты постов берутся из генератора, а не из auto_now_add"""
+        posts = self.seed()
+        latest = max(pub_date for _, pub_date in posts)
+        self.assertLess(latest.date().isoformat(), self.options['until'])
+
+    def test_seed_is_deterministic(self):
+        """Одинаковый seed даёт одинаковые данные"""
+        first = self.seed()
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        self.assertEqual(first, self.seed())
+
+    def test_seed_usernames_unique_across_runs(self):
+        """Номер в имени отделён от имени Faker и не повторяется"""
+        self.seed()
+        self.seed()
+        usernames = list(User.objects.values_list('username', flat=True))
+        self.assertEqual(len(set(usernames)), 20)
+        numbers = [int(name.rsplit('_', 1)[1]) for name in usernames]
+        self.assertEqual(len(set(numbers)), 20)
+
+    def test_seed_bumps_versions(self):
+        """После seed страницы не отдаются по старым ETag"""
+        url = reverse('posts:main')
+        etag = self.client.get(url)['ETag']
+        self.seed()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ExportCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.user, text='Старый')
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый')
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=cls.new_post.pub_date - timedelta(days=1)
+        )
+        Comment.objects.create(
+            post=cls.new_post, author=cls.reader, text='Комментарий'
+        )
+        cls.follow = Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command('export', *args, stdout=out, **options)
+        return out.getvalue().splitlines()
+
+    def test_export_posts_jsonl(self):
+        """Посты выгружаются в JSONL по возрастанию id"""
+        rows = [json.loads(line) for line in self.export('posts')]
+        self.assertEqual(
+            [row['id'] for row in rows], [self.old_post.id, self.new_post.id]
+        )
+        self.assertEqual(rows[1]['text'], 'Новый')
+
+    def test_export_since_watermark(self):
+        """С --since выгружаются записи с id больше отметки, даже со
+        старой датой"""
+        backdated = Post.objects.create(author=self.user, text='Импорт')
+        Post.objects.filter(pk=backdated.pk).update(
+            pub_date=self.old_post.pub_date - timedelta(days=1)
+        )
+        rows = [
+            json.loads(line)
+            for line in self.export('posts', since=str(self.old_post.id))
+        ]
+        self.assertEqual(
+            [row['id'] for row in rows], [self.new_post.id, backdated.id]
+        )
+        self.assertEqual(
+            self.export('follows', since=str(self.follow.id)), []
+        )
+
+    def test_export_csv(self):
+        """CSV-выгрузка начинается с заголовка"""
+        lines = self.export('comments', format='csv')
+        self.assertEqual(lines[0], 'id,post_id,author_id,text,created')
+        self.assertEqual(len(lines), 2)
+
+    def test_export_bad_since(self):
+        with self.assertRaises(CommandError):
+            self.export('posts', since='вчера')
+
+
+class ImportCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'dump.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.path))
+
+    def write(self, records):
+        with open(self.path, 'w', encoding='utf-8') as dump:
+            for record in records:
+                dump.write(
+                    record if isinstance(record, str)
+                    else json.dumps(record, ensure_ascii=False)
+                )
+                dump.write('\n')
+
+    def run_import(self, **options):
+        call_command('import_posts', self.path, stdout=StringIO(), **options)
+
+    def test_import_keeps_timestamps(self):
+        """Импорт сохраняет исходные даты и сопоставляет авторов и группы"""
+        self.write([
+            {'type': 'post', 'id': 100, 'text': 'Пост', 'author': 'author',
+             'group': 'test', 'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'type': 'comment', 'post': 100, 'author': 'author',
+             'text': 'Комментарий', 'created': '2020-01-03T00:00:00'},
+            {'type': 'post', 'text': 'Чужой', 'author': 'nobody'},
+        ])
+        self.run_import(chunk_size=2)
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        comment = Comment.objects.get(post=post)
+        self.assertEqual(comment.created.day, 3)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_import_resumes_from_checkpoint(self):
+        """После сбоя импорт продолжается с последней контрольной точки"""
+        posts = [
+            {'id': number, 'text': f'Пост {number}', 'author': 'author'}
+            for number in range(1, 5)
+        ]
+        self.write(posts[:2] + ['{broken'] + posts[2:])
+        with self.assertRaises(CommandError):
+            self.run_import(chunk_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.write(posts[:2] + [''] + posts[2:])
+        self.run_import(chunk_size=2)
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list('id', flat=True)),
+            [1, 2, 3, 4]
+        )
+
+    def test_comments_on_missing_posts_skipped(self):
+        """Комментарии к пропущенным и чужим постам не импортируются"""
+        existing = Post.objects.create(author=self.user, text='Старый')
+        self.write([
+            {'id': 200, 'text': 'Чужой', 'author': 'nobody'},
+            {'type': 'comment', 'post': 200, 'author': 'author',
+             'text': 'К пропущенному'},
+            {'id': existing.pk, 'text': 'Конфликт', 'author': 'author'},
+            {'type': 'comment', 'post': existing.pk, 'author': 'author',
+             'text': 'К конфликтному'},
+            {'type': 'comment', 'post': 404, 'author': 'author',
+             'text': 'К несуществующему'},
+            {'id': 201, 'text': 'Новый', 'author': 'author'},
+            {'type': 'comment', 'post': 201, 'author': 'author',
+             'text': 'К новому'},
+        ])
+        out = StringIO()
+        call_command('import_posts', self.path, chunk_size=3, stdout=out)
+        self.assertIn('пропущено 4, конфликтов id 1', out.getvalue())
+        self.assertEqual(existing.comments.count(), 0)
+        self.assertEqual(
+            list(Comment.objects.values_list('post_id', flat=True)), [201]
+        )
+        self.assertEqual(Post.objects.get(pk=existing.pk).text, 'Старый')
+
+    def test_import_bumps_versions(self):
+        """После импорта страницы не отдаются по старым ETag"""
+        self.write([{'text': 'Импортированный', 'author': 'author'}])
+        url = reverse('posts:profile', args=('author',))
+        etag = self.client.get(url)['ETag']
+        self.run_import()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Импортированный')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class SendDigestsCommandTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.readers = [
+            User.objects.create_user(
+                username=f'reader{number}', email=f'reader{number}@ya.ru'
+            )
+            for number in range(3)
+        ]
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+        Follow.objects.create(user=self.readers[0], author=self.other)
+        DigestRun.objects.create(
+            period_start=timezone.now() - timedelta(days=2),
+            period_end=timezone.now() - timedelta(days=1),
+            finished=True,
+        )
+
+    def send(self):
+        call_command('send_digests', page_size=1, stdout=StringIO())
+
+    def test_one_email_per_follower(self):
+        """Каждый подписчик получает одно письмо со всеми новыми постами"""
+        Post.objects.create(author=self.author, text='Пост автора')
+        Post.objects.create(author=self.other, text='Пост другого')
+        self.send()
+        self.assertEqual(len(mail.outbox), 3)
+        letters = {letter.to[0]: letter.body for letter in mail.outbox}
+        self.assertIn('Пост другого', letters['reader0@ya.ru'])
+        self.assertIn('Пост автора', letters['reader0@ya.ru'])
+        self.assertNotIn('Пост другого', letters['reader1@ya.ru'])
+
+    def test_next_run_starts_after_previous(self):
+        """Следующая рассылка не повторяет уже отправленные посты"""
+        Post.objects.create(author=self.author, text='Пост автора')
+        self.send()
+        mail.outbox.clear()
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(DigestRun.objects.filter(finished=False).count(), 0)
@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import COMMENT_MAX_DEPTH, Comment, Post
+from ..threads import (
+    COMMENTS_PER_PAGE, INLINE_DEPTH, comment_page, fill_root_paths,
+    with_replies
+)
+
+User = get_user_model()
+
+
+class CommentThreadsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def test_path_orders_thread(self):
+        """Ответы идут сразу под родителем в порядке path"""
+        first = self.comment('1')
+        second = self.comment('2')
+        reply = self.comment('1.1', first)
+        self.comment('1.1.1', reply)
+        self.comment('1.2', first)
+        texts = list(
+            Comment.objects.filter(post=self.post).order_by(
+                'path'
+            ).values_list('text', flat=True)
+        )
+        self.assertEqual(texts, ['1', '1.1', '1.1.1', '1.2', '2'])
+        first.refresh_from_db()
+        self.assertEqual(first.replies_count, 2)
+        self.assertTrue(reply.path.startswith(first.path))
+        self.assertFalse(second.path.startswith(first.path))
+
+    def test_depth_is_capped(self):
+        """Слишком глубокий ответ становится соседом родителя"""
+        parent = self.comment('0')
+        for level in range(COMMENT_MAX_DEPTH + 2):
+            parent = self.comment(str(level), parent)
+        self.assertEqual(parent.depth, COMMENT_MAX_DEPTH - 1)
+
+    def test_detail_shows_newest_comments(self):
+        """На странице поста только новые комментарии, старые — фрагментом"""
+        for number in range(COMMENTS_PER_PAGE + 2):
+            self.comment(f'Комментарий {number}')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(
+            comments[0].text, f'Комментарий {COMMENTS_PER_PAGE + 1}'
+        )
+        response = self.client.get(
+            response.context['more_url'],
+            {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий 1', 'Комментарий 0']
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        response = self.client.get(
+            reverse('posts:comments', args=(self.post.pk,)),
+            {'cursor': 'мусор'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_cost_is_bounded(self):
+        """Ответы и авторы загружаются одним запросом на страницу"""
+        for number in range(COMMENTS_PER_PAGE):
+            root = self.comment(f'Корень {number}')
+            self.comment('Ответ', root)
+        with self.assertNumQueries(2):
+            comments, _ = comment_page(self.post.pk)
+            self.assertEqual(
+                [comment.author.username for comment in comments],
+                ['reader'] * COMMENTS_PER_PAGE * 2
+            )
+
+    def test_deep_thread_collapsed(self):
+        """Глубокие ветки свёрнуты и подгружаются фрагментом"""
+        parent = self.comment('Корень')
+        for level in range(1, INLINE_DEPTH + 2):
+            parent = self.comment(f'Уровень {level}', parent)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.depth for comment in comments],
+            list(range(INLINE_DEPTH))
+        )
+        collapsed = comments[-1]
+        self.assertTrue(collapsed.collapsed)
+        replies_url = reverse(
+            'posts:comment_replies', args=(self.post.pk, collapsed.pk)
+        )
+        self.assertContains(response, replies_url)
+        response = self.client.get(replies_url)
+        self.assertEqual(
+            [comment.depth for comment in response.context['comments']],
+            [INLINE_DEPTH, INLINE_DEPTH + 1]
+        )
+
+    def test_inline_replies_limit(self):
+        """Ветка, не поместившаяся в лимит, свёрнута целиком"""
+        long_branch = self.comment('Старый')
+        for number in range(3):
+            self.comment(f'Ответ {number}', long_branch)
+        short_branch = self.comment('Новый')
+        self.comment('Ответ', short_branch)
+        roots = list(Comment.objects.filter(depth=0).order_by('-id'))
+        comments = with_replies(roots, INLINE_DEPTH, limit=2)
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ['Новый', 'Ответ', 'Старый']
+        )
+        self.assertFalse(comments[0].collapsed)
+        self.assertTrue(comments[2].collapsed)
+
+    def test_reply_form(self):
+        """Ответ через форму прикрепляется к комментарию"""
+        parent = self.comment('Вопрос')
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Ответ', 'parent': parent.pk}
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, parent)
+        self.assertEqual(reply.depth, 1)
+        other = Post.objects.create(author=self.user, text='Другой')
+        response = self.client.post(
+            reverse('posts:add_comment', args=(other.pk,)),
+            {'text': 'Чужой', 'parent': parent.pk}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_fill_root_paths(self):
+        """Пути вставленных пачкой комментариев считаются в SQL"""
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text=str(number))
+            for number in range(3)
+        ])
+        self.assertEqual(fill_root_paths(), 3)
+        for comment in Comment.objects.all():
+            self.assertEqual(comment.path, f'{comment.pk:010d}')
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.models import Post
+from ..counters import CounterBuffer, post_views
+
+User = get_user_model()
+
+
+class PostViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        post_views.discard()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.other = Post.objects.create(author=self.author, text='Другой')
+
+    def tearDown(self):
+        post_views.discard()
+
+    def test_views_buffered_and_flushed_in_one_update(self):
+        """Просмотры копятся в памяти и пишутся одним UPDATE"""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        for _ in range(3):
+            Client().get(url)
+        Client().get(reverse('posts:post_detail', args=(self.other.pk,)))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(post_views.flush(), 2)
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views, self.other.views), (3, 1))
+        response = Client().get(reverse('posts:main'))
+        self.assertContains(response, 'Просмотров: 3')
+
+    def test_threshold_triggers_flush(self):
+        buffer = CounterBuffer(post_views.flush_func, threshold=3)
+        for _ in range(3):
+            buffer.add(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+
+    def test_failed_flush_keeps_increments(self):
+        """Если запись не удалась, приращения остаются в буфере"""
+        def fail(deltas):
+            raise OperationalError('database is locked')
+
+        buffer = CounterBuffer(fail)
+        buffer.add(self.post.pk, 2)
+        with self.assertLogs('posts.counters', 'WARNING'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.pending[self.post.pk], 2)
+        buffer.discard()
+
+    def test_save_keeps_flushed_views(self):
+        """Редактирование поста не затирает накопленные просмотры"""
+        post_views.add(self.post.pk, 5)
+        post_views.flush()
+        PostForm({'text': 'Новый текст'}, instance=self.post).save()
+        self.post.refresh_from_db()
+        self.assertEqual(
+            (self.post.text, self.post.views), ('Новый текст', 5)
+        )
+
+    def test_save_of_deleted_post_reinserts(self):
+        """Сохранение удалённого поста вставляет его заново"""
+        Post.objects.filter(pk=self.post.pk).delete()
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertTrue(
+            Post.objects.filter(pk=self.post.pk, text='Новый текст').exists()
+        )
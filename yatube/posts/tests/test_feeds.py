@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from ..sitemaps import INDEX_NAME, build_sitemaps, shard_name
+
+User = get_user_model()
+SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FeedsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.in_group = Post.objects.create(
+            author=self.author, text='В группе', group=self.group
+        )
+        self.other = Post.objects.create(
+            author=User.objects.create_user(username='other'),
+            text='Без группы'
+        )
+        self.client = Client()
+
+    def test_feeds(self):
+        """Ленты сайта, группы и автора содержат свои записи"""
+        cases = (
+            (reverse('posts:feed'), ['В группе', 'Без группы']),
+            (reverse('posts:group_feed', args=('group',)), ['В группе']),
+            (reverse('posts:profile_feed', args=('other',)), ['Без группы']),
+        )
+        for url, texts in cases:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/atom+xml; charset=utf-8'
+                )
+                content = response.content.decode()
+                self.assertEqual(content.count('<entry>'), len(texts))
+                for text in texts:
+                    self.assertIn(text, content)
+        response = self.client.get(
+            reverse('posts:group_feed', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_conditional_get(self):
+        """Неизменившаяся лента отдаётся ответом 304"""
+        url = reverse('posts:feed')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новая')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT)
+class SitemapTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        author = User.objects.create_user(username='author')
+        self.posts = [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.client = Client()
+
+    def read(self, name):
+        with open(os.path.join(SITEMAP_ROOT, name), encoding='utf-8') as f:
+            return f.read()
+
+    def test_shards_cover_all_posts(self):
+        """Шарды по keyset-границам покрывают все записи"""
+        self.assertEqual(build_sitemaps(shard_size=2), (3, 5))
+        urls = ''.join(self.read(shard_name(number)) for number in (1, 2, 3))
+        for post in self.posts:
+            self.assertEqual(urls.count(
+                reverse('posts:post_detail', args=(post.pk,)) + '<'
+            ), 1)
+        index = self.read(INDEX_NAME)
+        self.assertEqual(index.count('<sitemap>'), 3)
+        self.assertIn(reverse('posts:sitemap_shard', args=(3,)), index)
+
+        path = os.path.join(SITEMAP_ROOT, shard_name(1))
+        mtime = os.stat(path).st_mtime_ns
+        Post.objects.filter(pk__in=[p.pk for p in self.posts[2:]]).delete()
+        self.assertEqual(build_sitemaps(shard_size=2), (1, 2))
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertFalse(
+            os.path.exists(os.path.join(SITEMAP_ROOT, shard_name(2)))
+        )
+
+    def test_served_without_queries(self):
+        """Карта сайта отдаётся из файла с поддержкой условного GET"""
+        out = StringIO()
+        call_command('build_sitemaps', shard_size=2, stdout=out)
+        self.assertIn('3 файлов, 5 адресов', out.getvalue())
+        url = reverse('posts:sitemap_shard', args=(2,))
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+        self.assertIn(
+            b'<sitemapindex',
+            b''.join(self.client.get(reverse('posts:sitemap')))
+        )
+        response = self.client.get(
+            reverse('posts:sitemap_shard', args=(4,))
+        )
+        self.assertEqual(response.status_code, 404)
@@ -2,16 +2,28 @@ import shutil
 import tempfile
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase, override_settings
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
+from core.jobs import run_pending
+from core.models import Job
 from posts.models import Post, Group, Comment
 
 User = get_user_model()
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -19,14 +31,7 @@ class TaskCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        cls.small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
+        cls.small_gif = SMALL_GIF
         cls.user = User.objects.create_user(username='testuser')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -142,10 +147,46 @@ class TaskCreateFormTests(TestCase):
             data=form_data,
             follow=True
         )
-        comments_response = self.authorized_client.get(
-            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
-        ).context['comments'].values_list("text", flat=True)
+        comments_response = [
+            comment.text for comment in self.authorized_client.get(
+                reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+            ).context['comments']
+        ]
         self.assertRedirects(response, reverse((
             'posts:post_detail'), kwargs={'post_id': f'{self.post.id}'}))
         self.assertEqual(Comment.objects.count(), comments_count + 1)
         self.assertIn(form_data['text'], comments_response)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailJobTests(TransactionTestCase):
+    """Задачи ставятся после коммита, поэтому нужны настоящие транзакции."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(
+            User.objects.create_user(username='testuser')
+        )
+
+    def test_create_post_schedules_thumbnails(self):
+        """Миниатюры нового поста строятся фоновой задачей"""
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': uploaded}
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        job = Job.objects.get(name='posts.make_thumbnails')
+        self.assertEqual(job.dedup_key, f'thumbnails:{post.pk}')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
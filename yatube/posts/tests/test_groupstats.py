@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, GroupStats, Post
+from ..groupstats import ACTIVE_PERIOD, refresh_group_stats
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.quiet = Group.objects.create(
+            title='Тихая', slug='quiet', description='Описание'
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_new_group_listed_empty(self):
+        """Новая группа сразу получает пустую статистику"""
+        stats = self.stats(self.quiet)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post)
+
+    def test_incremental_updates(self):
+        """Новые посты меняют статистику без пересчёта"""
+        first = Post.objects.create(
+            author=self.author, text='Первый', group=self.group
+        )
+        Post.objects.create(
+            author=self.author, text='Второй', group=self.group
+        )
+        last = Post.objects.create(
+            author=self.other, text='Третий', group=self.group
+        )
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.active_authors, 2)
+        self.assertEqual(stats.last_post, last.pub_date)
+        last.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.active_authors, 1)
+        first.group = self.quiet
+        first.save()
+        self.assertEqual(self.stats(self.group).posts_count, 1)
+        self.assertEqual(self.stats(self.quiet).posts_count, 1)
+
+    def test_refresh_corrects_drift(self):
+        """Пересчёт исправляет счётчики и убирает авторов вне окна"""
+        post = Post.objects.create(
+            author=self.author, text='Старый', group=self.group
+        )
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - ACTIVE_PERIOD - timedelta(days=1)
+        )
+        GroupStats.objects.filter(group=self.group).update(posts_count=10)
+        self.assertEqual(refresh_group_stats(), 2)
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.active_authors, 0)
+        out = StringIO()
+        call_command('update_group_stats', stdout=out)
+        self.assertIn('2 групп', out.getvalue())
+
+    def test_directory(self):
+        """Каталог упорядочен по последней активности"""
+        Post.objects.create(author=self.author, text='Пост', group=self.quiet)
+        response = Client().get(reverse('posts:group_index'))
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.quiet, self.group]
+        )
+        self.assertContains(response, 'Записей: 1')
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core.jobs import run_pending
+from posts.models import Comment, Follow, Notification, Post
+from ..notifications import unread_count
+from ..utils import POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+class NotificationsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def test_comment_and_follow_notify_author(self):
+        """Автор получает уведомления о комментарии и подписке"""
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        kinds = set(
+            Notification.objects.filter(user=self.author).values_list(
+                'kind', flat=True
+            )
+        )
+        self.assertEqual(kinds, {Notification.COMMENT, Notification.FOLLOW})
+        self.assertEqual(unread_count(self.author.pk), 2)
+
+    def test_unread_count_cached(self):
+        """Счётчик в шапке не делает COUNT на каждой странице"""
+        unread_count(self.author.pk)
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.author.pk), 1)
+
+    def test_inbox_marks_read_and_paginates(self):
+        """Просмотр ленты уведомлений отмечает их прочитанными"""
+        for number in range(POSTS_PER_PAGE + 2):
+            Comment.objects.create(
+                post=self.post, author=self.reader, text=f'К{number}'
+            )
+        response = self.author_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'прокомментировал')
+        self.assertEqual(
+            len(response.context['notifications']), POSTS_PER_PAGE
+        )
+        self.assertEqual(unread_count(self.author.pk), 2)
+        response = self.author_client.get(
+            reverse('posts:notifications'),
+            {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(len(response.context['notifications']), 2)
+        self.assertEqual(unread_count(self.author.pk), 0)
+        self.assertEqual(
+            unread_count(self.author.pk),
+            Notification.objects.filter(
+                user=self.author, is_read=False
+            ).count()
+        )
+
+
+class PostNotificationsTest(TransactionTestCase):
+    """Рассылка идёт через очередь, которая пишет задачи после коммита."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+
+    def test_new_post_fans_out_to_followers(self):
+        """Подписчики получают уведомление о новом посте через очередь"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        run_pending()
+        self.assertTrue(
+            Notification.objects.filter(
+                user=self.reader, kind=Notification.POST, post=post
+            ).exists()
+        )
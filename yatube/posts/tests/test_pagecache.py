@@ -0,0 +1,99 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from ..pagecache import single_flight, store
+
+User = get_user_model()
+
+WORKERS = 8
+KEY = 'tests:page'
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.computed = 0
+        self.counter_lock = threading.Lock()
+
+    def compute(self, value='new'):
+        def compute():
+            with self.counter_lock:
+                self.computed += 1
+            time.sleep(0.2)
+            return value
+        return compute
+
+    def in_parallel(self, compute):
+        barrier = threading.Barrier(WORKERS)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(single_flight(KEY, compute, 20))
+
+        threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_parallel_misses_compute_once(self):
+        """Одновременные промахи пересчитывают значение один раз"""
+        results = self.in_parallel(self.compute())
+        self.assertEqual(results, ['new'] * WORKERS)
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(single_flight(KEY, self.compute('other'), 20), 'new')
+        self.assertEqual(self.computed, 1)
+
+    def test_stale_while_revalidate(self):
+        """Пока один пересчитывает, остальные получают прежнее значение"""
+        store(KEY, 'old', -1, 0)
+        results = self.in_parallel(self.compute())
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(sorted(results), ['new'] + ['old'] * (WORKERS - 1))
+        self.assertEqual(single_flight(KEY, self.compute('other'), 20), 'new')
+
+    def test_probabilistic_early_refresh(self):
+        """Дорогое значение обновляется заранее с ростом вероятности"""
+        store(KEY, 'old', 10, 0.5)
+        with mock.patch('posts.pagecache.random.random', return_value=0.0):
+            self.assertEqual(single_flight(KEY, self.compute(), 20), 'old')
+        with mock.patch(
+            'posts.pagecache.random.random', return_value=1 - 1e-12
+        ):
+            self.assertEqual(single_flight(KEY, self.compute(), 20), 'new')
+        self.assertEqual(self.computed, 1)
+
+
+class PageCacheViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        Post.objects.create(author=self.author, text='Первый пост')
+
+    def test_new_version_not_served_from_old_body(self):
+        """Новая версия данных не отдаётся со старым телом страницы"""
+        url = reverse('posts:main')
+        self.client.get(url)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url)
+        self.assertContains(response, 'Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_authenticated_pages_not_shared(self):
+        """Страница пользователя не достаётся другому"""
+        url = reverse('posts:main')
+        for username in ('alice', 'bob'):
+            client = Client()
+            client.force_login(User.objects.create_user(username=username))
+            with self.subTest(username=username):
+                self.assertContains(client.get(url), username)
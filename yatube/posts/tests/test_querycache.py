@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.test import TransactionTestCase
+
+from posts.models import Group, Post, Reaction
+from ..querycache import (
+    cached_count, cached_query, get_cached_or_404, untracked_writes
+)
+
+User = get_user_model()
+
+
+class QueryCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+
+    def test_served_from_cache(self):
+        """Повторный запрос отдаётся из кэша без обращения к базе"""
+        posts = Post.objects.select_related('author', 'group')
+        self.assertEqual(cached_query(posts), [self.post])
+        self.assertEqual(cached_count(posts), 1)
+        self.assertEqual(get_cached_or_404(Group, slug='group'), self.group)
+        with self.assertNumQueries(0):
+            rows = cached_query(posts.all())
+            self.assertEqual(rows[0].author.username, 'author')
+            self.assertEqual(cached_count(posts.all()), 1)
+            self.assertEqual(
+                get_cached_or_404(Group, slug='group'), self.group
+            )
+
+    def test_writes_bump_tables(self):
+        """Любая запись в таблицу, даже в обход сигналов, сбрасывает кэш"""
+        posts = Post.objects.filter(group=self.group)
+        self.assertEqual(cached_count(posts), 1)
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Пачкой', group=self.group)
+        ])
+        self.assertEqual(cached_count(posts), 2)
+        Post.objects.filter(group=self.group).update(text='Изменён')
+        self.assertEqual(
+            {post.text for post in cached_query(posts)}, {'Изменён'}
+        )
+        Group.objects.filter(pk=self.group.pk).update(slug='renamed')
+        with self.assertRaises(Http404):
+            get_cached_or_404(Group, slug='group')
+
+    def test_transaction_bumps_on_commit(self):
+        """В транзакции после записи кэш обходится, версия меняется
+        при коммите, а после отката не меняется"""
+        posts = Post.objects.all()
+        self.assertEqual(cached_count(posts), 1)
+        with transaction.atomic():
+            Post.objects.create(author=self.author, text='Второй')
+            with self.assertNumQueries(1):
+                self.assertEqual(cached_count(posts), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(cached_count(posts), 2)
+        try:
+            with transaction.atomic():
+                Post.objects.create(author=self.author, text='Откат')
+                raise ValueError
+        except ValueError:
+            pass
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count(posts), 2)
+
+    def test_untracked_and_foreign_tables(self):
+        """Счётчики не сбрасывают кэш, таблицы без версий не кэшируются"""
+        posts = Post.objects.all()
+        self.assertEqual(cached_query(posts.all())[0].views, 0)
+        with untracked_writes():
+            Post.objects.update(views=5)
+        self.assertEqual(cached_query(posts.all())[0].views, 0)
+        self.assertEqual(cached_query(Reaction.objects.all()), [])
+        with self.assertNumQueries(1):
+            cached_query(Reaction.objects.all())
+
+    def test_last_login_does_not_bump_users(self):
+        """Вход пользователя не сбрасывает кэш запросов к auth_user"""
+        users = User.objects.filter(pk=self.author.pk)
+        self.assertEqual(cached_query(users), [self.author])
+        self.client.force_login(self.author)
+        with self.assertNumQueries(0):
+            cached_query(users.all())
+        User.objects.filter(pk=self.author.pk).update(
+            last_login=None, first_name='Имя'
+        )
+        self.assertEqual(cached_query(users.all())[0].first_name, 'Имя')
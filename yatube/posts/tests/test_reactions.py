@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, Reaction, ReactionCount
+from ..reactions import react, reaction_counts
+
+User = get_user_model()
+
+
+class ReactionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reaction_counts.discard()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(3)
+        ]
+
+    def tearDown(self):
+        reaction_counts.discard()
+
+    def counts(self):
+        return dict(
+            ReactionCount.objects.filter(post=self.post).values_list(
+                'kind', 'count'
+            )
+        )
+
+    def test_counts_flushed_in_batch(self):
+        """Реакции копятся в памяти и пишутся одним сбросом"""
+        for user in self.users:
+            react(user.pk, self.post.pk, Reaction.LIKE)
+        self.assertEqual(self.counts(), {})
+        with self.assertNumQueries(5):
+            self.assertEqual(reaction_counts.flush(), 1)
+        self.assertEqual(self.counts(), {Reaction.LIKE: 3})
+
+    def test_toggle_and_switch(self):
+        """Повторная реакция снимается, другая заменяет прежнюю"""
+        user = self.users[0]
+        react(user.pk, self.post.pk, Reaction.LIKE)
+        react(user.pk, self.post.pk, Reaction.SAD)
+        reaction_counts.flush()
+        self.assertEqual(self.counts(), {Reaction.SAD: 1})
+        self.assertIsNone(react(user.pk, self.post.pk, Reaction.SAD))
+        reaction_counts.flush()
+        self.assertEqual(self.counts(), {Reaction.SAD: 0})
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_feed_shows_counts(self):
+        """Лента показывает счётчики без COUNT по реакциям"""
+        ReactionCount.objects.create(
+            post=self.post, kind=Reaction.LOVE, count=7
+        )
+        response = Client().get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertContains(response, '❤️ 7')
+
+    def test_react_view(self):
+        client = Client()
+        client.force_login(self.users[0])
+        url = reverse('posts:post_react', args=(self.post.pk,))
+        self.assertEqual(client.post(url, {'kind': 'boo'}).status_code, 400)
+        response = client.post(url, {'kind': Reaction.LIKE})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertTrue(
+            Reaction.objects.filter(
+                user=self.users[0], kind=Reaction.LIKE
+            ).exists()
+        )
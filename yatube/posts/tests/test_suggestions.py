@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion, Post
+from ..graph import (
+    CHANGES_KEY, IN_LIST_LIMIT, FollowGraph, FollowIndex, follow_graph,
+    invalidate_follow_graph
+)
+from ..suggestions import update_suggestions
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    def test_csr_adjacency(self):
+        graph = FollowGraph([(1, 5), (1, 3), (3, 5), (7, 1), (1, 3)])
+        self.assertEqual(list(graph.nodes), [1, 3, 5, 7])
+        self.assertEqual(graph.following_of(1), [3, 5])
+        self.assertEqual(graph.followers_of(5), [1, 3])
+        self.assertEqual(graph.followers_count(1), 1)
+        self.assertEqual(graph.following_count(5), 0)
+        self.assertTrue(graph.is_following(7, 1))
+        self.assertFalse(graph.is_following(1, 7))
+        self.assertFalse(graph.is_following(2, 1))
+        self.assertEqual(graph.following_of(42), [])
+
+
+class SuggestionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('me', 'friend', 'other', 'star', 'niche', 'lonely')
+        }
+        for user, author in (
+            ('me', 'friend'), ('me', 'other'),
+            ('friend', 'star'), ('other', 'star'), ('friend', 'niche'),
+            ('lonely', 'friend'),
+        ):
+            Follow.objects.create(
+                user=self.users[user], author=self.users[author]
+            )
+
+    def names(self, user):
+        return list(
+            FollowSuggestion.objects.filter(
+                user=self.users[user]
+            ).values_list('author__username', flat=True)
+        )
+
+    def test_co_follow_ranking(self):
+        """Выше те, на кого подписаны многие из ваших авторов"""
+        self.assertEqual(update_suggestions(), 4)
+        self.assertEqual(self.names('me')[:2], ['star', 'niche'])
+        self.assertNotIn('friend', self.names('me'))
+        self.assertNotIn('me', self.names('me'))
+
+    def test_profile_reads_precomputed_rows(self):
+        """Страницы показывают готовые рекомендации без уже подписанных"""
+        update_suggestions()
+        client = Client()
+        client.force_login(self.users['me'])
+        Follow.objects.create(
+            user=self.users['me'], author=self.users['niche']
+        )
+        response = client.get(reverse('posts:follow_index'))
+        suggested = [
+            suggestion.author.username
+            for suggestion in response.context['suggestions']
+        ]
+        self.assertEqual(suggested[0], 'star')
+        self.assertNotIn('niche', suggested)
+        response = client.get(
+            reverse('posts:profile', args=('friend',))
+        )
+        self.assertContains(response, 'Кого почитать')
+
+
+class FollowIndexTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_signals_keep_index_current(self):
+        """Подписка и отписка видны в графе без перезагрузки"""
+        graph = follow_graph()
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIs(follow_graph(), graph)
+        self.assertTrue(graph.is_following(self.reader.pk, self.author.pk))
+        self.assertEqual(graph.followers_of(self.author.pk), [self.reader.pk])
+        self.assertEqual(graph.followers_count(self.author.pk), 1)
+        follow.delete()
+        self.assertIs(follow_graph(), graph)
+        self.assertFalse(graph.is_following(self.reader.pk, self.author.pk))
+        self.assertEqual(graph.following_count(self.reader.pk), 0)
+
+    def test_other_process_catches_up_from_log(self):
+        """Другой процесс применяет журнал изменений без загрузки графа"""
+        graph = follow_graph()
+        other = FollowIndex(graph.graph, graph.version, graph.seq)
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertTrue(other.catch_up(cache.get(CHANGES_KEY)))
+        self.assertEqual(other.following_of(self.reader.pk), [self.author.pk])
+
+    def test_lost_counter_reloads(self):
+        """После потери счётчика журнала граф загружается заново"""
+        graph = follow_graph()
+        Follow.objects.create(user=self.author, author=self.reader)
+        cache.delete(CHANGES_KEY)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIsNot(follow_graph(), graph)
+        self.assertTrue(
+            follow_graph().is_following(self.reader.pk, self.author.pk)
+        )
+
+    def test_rolled_back_follow_not_applied(self):
+        """Подписка из откатанной транзакции не попадает в граф"""
+        graph = follow_graph()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Follow.objects.create(user=self.reader, author=self.author)
+                raise RuntimeError
+        self.assertIs(follow_graph(), graph)
+        self.assertFalse(graph.is_following(self.reader.pk, self.author.pk))
+
+    def test_other_process_change_reloads(self):
+        """Смена версии в общем кэше перезагружает граф"""
+        graph = follow_graph()
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author)
+        ])
+        self.assertFalse(
+            follow_graph().is_following(self.reader.pk, self.author.pk)
+        )
+        invalidate_follow_graph()
+        self.assertIsNot(follow_graph(), graph)
+        self.assertTrue(
+            follow_graph().is_following(self.reader.pk, self.author.pk)
+        )
+
+    def test_follow_feed_with_long_author_list(self):
+        """Длинный список авторов ленты заменяется подзапросом"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Пост автора')
+        for limit in (IN_LIST_LIMIT, 0):
+            with self.subTest(limit=limit), mock.patch(
+                'posts.graph.IN_LIST_LIMIT', limit
+            ):
+                response = self.client.get(reverse('posts:follow_index'))
+                self.assertContains(response, 'Пост автора')
+
+    def test_profile_without_follow_queries(self):
+        """Профиль и списки подписок не обращаются к таблице подписок"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow_graph()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:profile', args=(self.author.username,))
+            )
+            followers = self.client.get(
+                reverse('posts:profile_followers', args=('author',))
+            )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertEqual(list(followers.context['page_obj']), [self.reader])
+        self.assertFalse(
+            [query for query in queries if '"posts_follow"' in query['sql']]
+        )
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, GroupFollow, Post
+from ..graph import follow_graph
+from ..timeline import merged_feed
+
+User = get_user_model()
+
+
+class MergedFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.client = Client()
+        self.client.force_login(self.reader)
+        now = timezone.now()
+        for number in range(30):
+            author = self.authors[number % 3]
+            post = Post.objects.create(
+                author=author,
+                text=f'Пост {number}',
+                group=self.group if number % 4 == 0 else None,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=number // 2)
+            )
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+
+    def expected(self):
+        return list(
+            Post.objects.filter(
+                Q(author__in=self.authors[:2]) | Q(group=self.group)
+            ).order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+
+    def test_pages_follow_merged_order(self):
+        """Страницы ленты идут по убыванию даты без повторов и пропусков"""
+        seen, cursor = [], None
+        while True:
+            posts, cursor = merged_feed(self.reader.pk, cursor, size=3)
+            seen.extend(post.pk for post in posts)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected())
+
+    def test_query_per_source(self):
+        """Каждый источник читается своим запросом, посты — одним"""
+        follow_graph()
+        with self.assertNumQueries(5):
+            posts, _ = merged_feed(self.reader.pk, size=3)
+            authors = [post.author for post in posts]
+        self.assertEqual(
+            [post.pk for post in posts], self.expected()[:3]
+        )
+        self.assertTrue(set(authors) <= set(self.authors))
+
+    def test_home_view(self):
+        """Лента отдаётся с курсором, испорченный курсор — 404"""
+        response = self.client.get(reverse('posts:home'))
+        posts = response.context['posts']
+        self.assertEqual(
+            [post.pk for post in posts], self.expected()[:len(posts)]
+        )
+        self.assertIsNotNone(response.context['next_cursor'])
+        response = self.client.get(reverse('posts:home'), {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_follow(self):
+        """Подписка на группу добавляет её посты в ленту"""
+        other = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        post = Post.objects.create(
+            author=self.authors[2], text='В другой группе', group=other
+        )
+        url = reverse('posts:group_posts', args=(other.slug,))
+        self.client.get(reverse('posts:group_follow', args=(other.slug,)))
+        self.client.get(reverse('posts:group_follow', args=(other.slug,)))
+        self.assertEqual(
+            GroupFollow.objects.filter(user=self.reader, group=other).count(),
+            1
+        )
+        self.assertTrue(self.client.get(url).context['following'])
+        posts = self.client.get(reverse('posts:home')).context['posts']
+        self.assertEqual(posts[0], post)
+        self.client.get(reverse('posts:group_unfollow', args=(other.slug,)))
+        self.assertFalse(self.client.get(url).context['following'])
+        posts = self.client.get(reverse('posts:home')).context['posts']
+        self.assertNotIn(post, posts)
@@ -0,0 +1,129 @@
+import math
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (
+    Comment, Follow, Group, Post, PostScore, Reaction, TrendingPost,
+    TrendingState
+)
+from ..trending import DECAY, update_trending
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.first = Post.objects.create(author=self.author, text='Первый')
+        self.second = Post.objects.create(
+            author=self.author, text='Второй', group=self.group
+        )
+
+    def ranking(self, group=None):
+        return list(
+            TrendingPost.objects.filter(group=group).values_list(
+                'post_id', flat=True
+            )
+        )
+
+    def test_ranking_by_weighted_events(self):
+        """Комментарии весят больше реакций, топ строится и по группам"""
+        Comment.objects.create(
+            post=self.first, author=self.reader, text='Комментарий'
+        )
+        Reaction.objects.create(
+            post=self.second, user=self.reader, kind=Reaction.LIKE
+        )
+        self.assertEqual(update_trending(), 2)
+        self.assertEqual(self.ranking(), [self.first.pk, self.second.pk])
+        self.assertEqual(self.ranking(self.group), [self.second.pk])
+
+    def test_incremental_update(self):
+        """Повторный запуск учитывает только новые события"""
+        Reaction.objects.create(
+            post=self.first, user=self.reader, kind=Reaction.LIKE
+        )
+        update_trending()
+        self.assertEqual(update_trending(), 0)
+        Comment.objects.create(
+            post=self.second, author=self.reader, text='Комментарий'
+        )
+        with self.assertNumQueries(14):
+            update_trending()
+        self.assertEqual(self.ranking(), [self.second.pk, self.first.pk])
+        state = TrendingState.objects.get()
+        self.assertEqual(
+            state.last_comment_id, Comment.objects.latest('pk').pk
+        )
+
+    def test_recent_events_weigh_more(self):
+        """Старое событие затухает и уступает свежему"""
+        old = Comment.objects.create(
+            post=self.first, author=self.reader, text='Давний'
+        )
+        Comment.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(hours=12)
+        )
+        Reaction.objects.create(
+            post=self.second, user=self.reader, kind=Reaction.LIKE
+        )
+        update_trending()
+        self.assertEqual(self.ranking(), [self.second.pk, self.first.pk])
+
+    def test_follows_and_stale_posts(self):
+        """Подписки поднимают свежие посты автора, старые выбывают"""
+        Post.objects.filter(pk=self.first.pk).update(
+            pub_date=timezone.now() - timedelta(days=10)
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        update_trending()
+        self.assertEqual(self.ranking(), [self.second.pk])
+
+    @mock.patch('posts.trending.REBASE_EXPONENT', 0.1)
+    def test_rebase_keeps_order(self):
+        """Перенос начала отсчёта уменьшает веса, не меняя порядок"""
+        Comment.objects.create(
+            post=self.first, author=self.reader, text='Комментарий'
+        )
+        update_trending()
+        score = PostScore.objects.get(post=self.first).score
+        later = timezone.now() + timedelta(hours=2)
+        Reaction.objects.create(
+            post=self.second, user=self.reader, kind=Reaction.LIKE
+        )
+        update_trending(now=later)
+        self.assertEqual(TrendingState.objects.get().epoch, later)
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=self.first).score,
+            score * math.exp(-DECAY * 2 * 60 * 60),
+            places=3
+        )
+        self.assertEqual(self.ranking(), [self.first.pk, self.second.pk])
+
+    def test_trending_view_is_single_read(self):
+        """Страница популярного — одно чтение готовой таблицы"""
+        Comment.objects.create(
+            post=self.second, author=self.reader, text='Комментарий'
+        )
+        update_trending()
+        with self.assertNumQueries(1):
+            response = Client().get(reverse('posts:trending'))
+        self.assertEqual(
+            [entry.post for entry in response.context['entries']],
+            [self.second]
+        )
+        response = Client().get(
+            reverse('posts:group_trending', args=(self.group.slug,))
+        )
+        self.assertContains(response, 'Второй')
@@ -1,11 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 from django import forms
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from posts.models import Post, Group, Follow
+from posts.models import Post, Group, Follow, Comment
 from ..utils import POSTS_PER_PAGE
 
 User = get_user_model()
@@ -68,15 +68,19 @@ class ViewsTests(TestCase):
         """Тест кэша главной страницы"""
         response = self.client.get(reverse(self.index))
         cached_response_content = response.content
-        post1 = Post.objects.create(text='Второй пост', author=self.user)
+        Post.objects.filter(id=self.post.id).update(text='Изменённый пост')
         response = self.client.get(reverse(self.index))
         self.assertEqual(cached_response_content, response.content)
         cache.clear()
         response = self.client.get(reverse(self.index))
         self.assertNotEqual(cached_response_content, response.content)
+        cached_response_content = response.content
+        post1 = Post.objects.create(text='Второй пост', author=self.user)
+        response = self.client.get(reverse(self.index))
+        self.assertContains(response, 'Второй пост')
         Post.objects.filter(id=post1.id).delete()
         response = self.client.get(reverse(self.index))
-        self.assertNotEqual(cached_response_content, response.content)
+        self.assertEqual(cached_response_content, response.content)
 
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
@@ -288,8 +292,9 @@ class PaginatorViewsTest(TestCase):
                 )
 
 
-class FollowViewsTest(TestCase):
+class FollowViewsTest(TransactionTestCase):
     def setUp(self):
+        cache.clear()
         self.follower = User.objects.create_user(username='Follower')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.follower)
@@ -339,3 +344,109 @@ class FollowViewsTest(TestCase):
         response = self.authorized_client.get(
             reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 0)
+
+
+class ExportViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def test_export_staff_only(self):
+        """Выгрузка недоступна обычному пользователю"""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:export', args=('posts',)))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_streams_rows(self):
+        """Сотрудник получает потоковую выгрузку"""
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(
+            reverse('posts:export', args=('posts',)), {'format': 'csv'}
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Тестовый пост', lines[1])
+        response = client.get(
+            reverse('posts:export', args=('posts',)), {'since': 'вчера'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalGetViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:main'),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.id,)),
+        ]
+
+    def test_not_modified_without_queries(self):
+        """Неизменившаяся страница отдаётся как 304 без запросов к БД"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag ленты, группы и профиля"""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_post_etag(self):
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Авторизованный пользователь не получает 304 по чужому ETag"""
+        url = reverse('posts:profile', args=(self.author.username,))
+        etag = self.client.get(url)['ETag']
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_etags(self):
+        """Подписка меняет ETag профилей автора и подписчика"""
+        reader = User.objects.create_user(username='reader')
+        urls = [
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:profile', args=(reader.username,)),
+        ]
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Follow.objects.create(user=reader, author=self.author)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
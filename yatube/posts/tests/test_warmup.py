@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from ..groupstats import refresh_group_stats
+from ..warmup import warm_cache, warm_on_startup, warmup_urls
+
+User = get_user_model()
+
+
+def make_site():
+    author = User.objects.create_user(username='author')
+    popular = User.objects.create_user(username='popular')
+    for username in ('first', 'second'):
+        Follow.objects.create(
+            user=User.objects.create_user(username=username),
+            author=popular
+        )
+    Follow.objects.create(user=popular, author=author)
+    group = Group.objects.create(
+        title='Группа', slug='group', description='Описание'
+    )
+    Group.objects.create(title='Пустая', slug='empty', description='')
+    Post.objects.create(author=author, text='Пост', group=group)
+    refresh_group_stats()
+
+
+class WarmupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_site()
+
+    def test_urls(self):
+        """Прогреваются главная, активные группы и популярные авторы"""
+        self.assertEqual(warmup_urls(pages=2, groups=1, authors=2), [
+            reverse('posts:main'),
+            reverse('posts:main') + '?page=2',
+            reverse('posts:group_posts', args=('group',)),
+            reverse('posts:profile', args=('popular',)),
+            reverse('posts:profile', args=('author',)),
+        ])
+
+    def test_command_fills_page_cache(self):
+        """После прогрева главная отдаётся без запросов к базе"""
+        out = StringIO()
+        call_command('warm_cache', workers=1, stdout=out)
+        self.assertIn('Прогрето страниц: 6, с ошибкой: 0', out.getvalue())
+        client = Client(HTTP_HOST=urlsplit(settings.SITE_URL).netloc)
+        with self.assertNumQueries(0):
+            response = client.get(reverse('posts:main'))
+        self.assertContains(response, 'Пост')
+
+    def test_failing_page_counted(self):
+        """Ошибка страницы считается неудачей и не прерывает прогрев"""
+        with mock.patch('posts.views.render', side_effect=RuntimeError):
+            with self.assertLogs('django.request', 'ERROR'):
+                self.assertEqual(warm_cache(workers=1), (0, 6, 0))
+
+    def test_startup_hook_never_raises(self):
+        """Сбой прогрева при запуске только логируется"""
+        with mock.patch(
+            'posts.warmup.warm_cache', side_effect=RuntimeError
+        ), self.assertLogs('posts.warmup', 'ERROR'):
+            warm_on_startup()
+
+
+class WarmupPoolTest(TransactionTestCase):
+    def test_worker_pool(self):
+        """Страницы рендерятся пулом потоков"""
+        cache.clear()
+        make_site()
+        self.assertEqual(warm_cache(workers=3), (6, 0, 0))
@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+from django.db.models import Case, CharField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, LPad
+
+from .models import COMMENT_PATH_STEP, Comment
+from .utils import keyset_page
+
+COMMENTS_PER_PAGE: int = 10
+INLINE_DEPTH: int = 3
+INLINE_REPLIES: int = 50
+
+
+def path_end(path):
+    """Первая строка после всех путей, начинающихся с path."""
+    return path[:-1] + chr(ord(path[-1]) + 1)
+
+
+def fill_root_paths(after_id=0):
+    """Проставляет пути корневым комментариям, вставленным пачкой.
+
+    bulk_create обходит Comment.save, поэтому путь считается в SQL
+    по id; диапазон по первичному ключу ограничивает обновление
+    только что вставленными строками.
+    """
+    return Comment.objects.filter(pk__gt=after_id, path='').update(
+        path=LPad(
+            Cast('id', CharField()), COMMENT_PATH_STEP, Value('0')
+        )
+    )
+
+
+def with_replies(roots, depth_limit, limit=INLINE_REPLIES):
+    """Комментарии roots вместе с ответами до depth_limit в порядке показа.
+
+    Ответы всех веток выбираются одним запросом по диапазонам path
+    и не больше limit строк. Ветки, не поместившиеся целиком, и ответы
+    на уровне depth_limit остаются свёрнутыми — их подгружает фрагмент.
+    """
+    if not roots:
+        return []
+    ranges, positions = Q(), []
+    for position, root in enumerate(roots):
+        branch = Q(path__gt=root.path, path__lt=path_end(root.path))
+        ranges |= branch
+        positions.append(When(branch, then=Value(position)))
+    replies = list(
+        Comment.objects.filter(
+            ranges, post_id=roots[0].post_id, depth__lt=depth_limit
+        ).select_related('author').annotate(
+            root_position=Case(*positions, output_field=IntegerField())
+        ).order_by('root_position', 'path')[:limit + 1]
+    )
+    complete = len(roots)
+    if len(replies) > limit:
+        complete = replies[limit].root_position
+    replies_by_root = defaultdict(list)
+    for reply in replies:
+        if reply.root_position < complete:
+            replies_by_root[reply.root_position].append(reply)
+
+    comments = []
+    for position, root in enumerate(roots):
+        root.collapsed = bool(root.replies_count) and (
+            position >= complete or root.depth + 1 >= depth_limit
+        )
+        comments.append(root)
+        for reply in replies_by_root[position]:
+            reply.collapsed = bool(reply.replies_count) and (
+                reply.depth + 1 >= depth_limit
+            )
+            comments.append(reply)
+    return comments
+
+
+def comment_page(post_id, parent=None, cursor=None, size=COMMENTS_PER_PAGE):
+    """Страница комментариев поста или ответов на parent с ветками.
+
+    Корневые комментарии идут от новых к старым, ответы — от старых
+    к новым; обе выборки листаются keyset-курсором по (created, id).
+    Возвращает комментарии в порядке показа и курсор следующей
+    страницы.
+    """
+    comments, next_cursor = keyset_page(
+        Comment.objects.filter(
+            post_id=post_id, parent=parent
+        ).select_related('author'),
+        'created',
+        cursor,
+        size,
+        descending=parent is None,
+    )
+    depth = parent.depth + 1 if parent else 0
+    return with_replies(comments, depth + INLINE_DEPTH), next_cursor
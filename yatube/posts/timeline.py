@@ -0,0 +1,73 @@
+import heapq
+from itertools import groupby, islice
+
+from django.db.models import Q
+
+from .graph import follow_graph
+from .models import GroupFollow, Post
+from .utils import POSTS_PER_PAGE, decode_cursor, encode_cursor
+
+
+def source_stream(queryset, after=None, chunk=POSTS_PER_PAGE + 1):
+    """Ключи (pub_date, id) постов одного источника от новых к старым.
+
+    Источник — автор или группа: запрос идёт по индексу
+    (author|group, -pub_date) и читает только ключи. Строки выбираются
+    порциями по chunk, следующая порция запрашивается, только если
+    слияние дошло до конца предыдущей.
+    """
+    queryset = queryset.order_by('-pub_date', '-id').values_list(
+        'pub_date', 'id'
+    )
+    while True:
+        page = queryset
+        if after is not None:
+            date, pk = after
+            page = page.filter(pub_date__lte=date).exclude(
+                Q(pub_date=date) & Q(id__gte=pk)
+            )
+        rows = list(page[:chunk])
+        yield from rows
+        if len(rows) < chunk:
+            return
+        after = rows[-1]
+
+
+def feed_sources(user_id):
+    """Querysets источников ленты: авторы по подпискам и группы."""
+    groups = GroupFollow.objects.filter(user_id=user_id).values_list(
+        'group_id', flat=True
+    )
+    return [
+        Post.objects.filter(author_id=author_id)
+        for author_id in follow_graph().following_of(user_id)
+    ] + [Post.objects.filter(group_id=group_id) for group_id in groups]
+
+
+def merged_feed(user_id, cursor=None, size=POSTS_PER_PAGE):
+    """Страница ленты подписок на авторов и группы и курсор следующей.
+
+    Вместо одного запроса с OR по всем подпискам каждый источник
+    читается своим упорядоченным запросом, а потоки сливаются кучей
+    (heapq.merge). Пост автора из группы, на которую тоже есть
+    подписка, приходит из двух потоков с одинаковым ключом и
+    показывается один раз. Посты страницы загружаются одним запросом.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    streams = [
+        source_stream(queryset, after, size + 1)
+        for queryset in feed_sources(user_id)
+    ]
+    keys = [
+        key for key, _ in islice(
+            groupby(heapq.merge(*streams, reverse=True)), size + 1
+        )
+    ]
+    next_cursor = None
+    if len(keys) > size:
+        keys = keys[:size]
+        next_cursor = encode_cursor(*keys[-1])
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for _, pk in keys]
+    )
+    return [posts[pk] for _, pk in keys if pk in posts], next_cursor
@@ -0,0 +1,156 @@
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, FloatField
+from django.utils import timezone
+
+from core.jobs import enqueue
+from .bulk import bulk_create
+from .counters import increment_by
+from .models import (
+    Comment, Follow, Post, PostScore, Reaction, TrendingPost, TrendingState
+)
+from .versions import bump_versions
+
+HALF_LIFE = timedelta(hours=6)
+DECAY: float = math.log(2) / HALF_LIFE.total_seconds()
+TRENDING_WINDOW = timedelta(days=3)
+TRENDING_SIZE: int = 30
+UPDATE_INTERVAL: int = 5 * 60
+REBASE_EXPONENT: float = 50.0
+COMMENT_WEIGHT: float = 3.0
+REACTION_WEIGHT: float = 1.0
+FOLLOW_WEIGHT: float = 2.0
+
+
+def event_weight(base, when, epoch):
+    """Вес события, приведённый к началу отсчёта epoch.
+
+    Вместо того чтобы уменьшать все рейтинги со временем, новые события
+    получают вес e^(λ·t): порядок постов при этом тот же, что и при
+    экспоненциальном затухании, а старые строки не переписываются.
+    """
+    return base * math.exp(DECAY * (when - epoch).total_seconds())
+
+
+def rebase(state, now):
+    """Переносит начало отсчёта, пока веса не стали слишком большими."""
+    exponent = DECAY * (now - state.epoch).total_seconds()
+    if exponent < REBASE_EXPONENT:
+        return
+    PostScore.objects.update(score=F('score') * math.exp(-exponent))
+    state.epoch = now
+
+
+def collect_post_events(queryset, after_id, base, epoch, scores):
+    """Добавляет в scores веса событий с id больше after_id."""
+    for pk, post_id, created in queryset.filter(pk__gt=after_id).order_by(
+        'pk'
+    ).values_list('pk', 'post_id', 'created').iterator():
+        scores[post_id] += event_weight(base, created, epoch)
+        after_id = pk
+    return after_id
+
+
+def collect_follow_events(after_id, since, epoch, scores):
+    """Новые подписчики автора поднимают его свежие посты."""
+    by_author = defaultdict(float)
+    for pk, author_id, created in Follow.objects.filter(
+        pk__gt=after_id
+    ).order_by('pk').values_list('pk', 'author_id', 'created').iterator():
+        by_author[author_id] += event_weight(FOLLOW_WEIGHT, created, epoch)
+        after_id = pk
+    for post_id, author_id in Post.objects.filter(
+        author_id__in=list(by_author), pub_date__gte=since
+    ).order_by().values_list('id', 'author_id').iterator():
+        scores[post_id] += by_author[author_id]
+    return after_id
+
+
+def rebuild_ranking():
+    """Пересобирает таблицу лучших постов: общий топ и топ каждой группы.
+
+    PostScore содержит только свежие посты с активностью, поэтому
+    отбор топа в памяти дешёвый.
+    """
+    rows = list(PostScore.objects.values_list(
+        'post_id', 'score', 'post__group_id'
+    ))
+    by_group = defaultdict(list)
+    for row in rows:
+        if row[2] is not None:
+            by_group[row[2]].append(row)
+    entries = []
+    for group_id, group_rows in [(None, rows), *by_group.items()]:
+        top = heapq.nlargest(
+            TRENDING_SIZE, group_rows, key=lambda row: (row[1], row[0])
+        )
+        entries.extend(
+            TrendingPost(
+                group_id=group_id, rank=rank, post_id=post_id, score=score
+            )
+            for rank, (post_id, score, _) in enumerate(top, start=1)
+        )
+    TrendingPost.objects.all().delete()
+    bulk_create(TrendingPost, entries)
+    return len(entries)
+
+
+def update_trending(now=None):
+    """Досчитывает рейтинги по событиям с прошлого запуска.
+
+    Комментарии, реакции и подписки читаются начиная с сохранённых id,
+    поэтому каждый запуск обрабатывает только новые события. Посты
+    старше TRENDING_WINDOW выбывают из рейтинга.
+    """
+    now = now or timezone.now()
+    since = now - TRENDING_WINDOW
+    with transaction.atomic():
+        state = TrendingState.objects.select_for_update().first()
+        if state is None:
+            state = TrendingState(epoch=now)
+        rebase(state, now)
+        scores = defaultdict(float)
+        state.last_comment_id = collect_post_events(
+            Comment.objects.all(),
+            state.last_comment_id, COMMENT_WEIGHT, state.epoch, scores
+        )
+        state.last_reaction_id = collect_post_events(
+            Reaction.objects.all(),
+            state.last_reaction_id, REACTION_WEIGHT, state.epoch, scores
+        )
+        state.last_follow_id = collect_follow_events(
+            state.last_follow_id, since, state.epoch, scores
+        )
+        recent = Post.objects.filter(
+            id__in=list(scores), pub_date__gte=since
+        ).order_by().values_list('id', flat=True)
+        scores = {post_id: scores[post_id] for post_id in recent}
+        existing = set(PostScore.objects.filter(
+            post_id__in=list(scores)
+        ).values_list('post_id', flat=True))
+        bulk_create(PostScore, [
+            PostScore(post_id=post_id, score=score)
+            for post_id, score in scores.items()
+            if post_id not in existing
+        ])
+        increment_by(
+            PostScore.objects.all(), 'post_id', 'score',
+            {post_id: scores[post_id] for post_id in existing},
+            FloatField(),
+        )
+        PostScore.objects.filter(post__pub_date__lt=since).delete()
+        rebuild_ranking()
+        state.save()
+    bump_versions('trending')
+    return len(scores)
+
+
+def schedule_trending(delay=UPDATE_INTERVAL):
+    """Ставит следующий пересчёт; в очереди всегда не больше одного."""
+    return enqueue(
+        'posts.update_trending', dedup_key='update-trending', delay=delay
+    )
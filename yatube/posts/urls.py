@@ -1,23 +1,98 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 
 app_name = 'posts'
 
+ARCHIVE_PERIODS = (
+    '<int:year>/',
+    '<int:year>/<int:month>/',
+    '<int:year>/<int:month>/<int:day>/',
+)
+
 urlpatterns = [
     path('', views.index, name='main'),
+    path('trending/', views.trending, name='trending'),
+    path('feed.atom', views.latest_feed, name='feed'),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path(
+        'sitemap-posts-<int:number>.xml',
+        views.sitemap,
+        name='sitemap_shard'
+    ),
+    path(
+        'group/<slug:slug>/feed.atom',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed.atom',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.trending,
+        name='group_trending'
+    ),
+    path(
+        'group/<slug:slug>/follow/',
+        views.group_follow,
+        name='group_follow'
+    ),
+    path(
+        'group/<slug:slug>/unfollow/',
+        views.group_unfollow,
+        name='group_unfollow'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
+    *(
+        path(f'{prefix}{period}', views.archive, name=name)
+        for prefix, name in (
+            ('archive/', 'archive'),
+            ('group/<slug:slug>/', 'group_archive'),
+            ('profile/<str:username>/', 'profile_archive'),
+        )
+        for period in ARCHIVE_PERIODS
+    ),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/replies/',
+        views.comment_replies,
+        name='comment_replies'
+    ),
+    path(
+        'posts/<int:post_id>/react/',
+        views.post_react,
+        name='post_react'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('feed/', views.home, name='home'),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -28,4 +103,16 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('notifications/', views.notifications, name='notifications'),
+    path('export/<slug:name>/', views.export, name='export'),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_posts'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'
+    ),
 ]
@@ -1,10 +1,56 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 POSTS_PER_PAGE: int = 10
 
 
-def get_page_context(queryset, request):
-    paginator = Paginator(queryset, POSTS_PER_PAGE)
+def get_page_context(queryset, request, paginator_class=Paginator):
+    paginator = paginator_class(queryset, POSTS_PER_PAGE)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def encode_cursor(date, pk):
+    payload = json.dumps([date.isoformat(), pk]).encode()
+    return urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(urlsafe_b64decode(cursor.encode()))
+        date = parse_datetime(value)
+    except (TypeError, ValueError):
+        raise ValueError('Некорректный курсор')
+    if date is None or not isinstance(pk, int):
+        raise ValueError('Некорректный курсор')
+    return date, pk
+
+
+def keyset_page(queryset, field, cursor=None, size=POSTS_PER_PAGE,
+                descending=True):
+    """Страница keyset-пагинации по паре (field, id).
+
+    Возвращает строки страницы и курсор следующей страницы или None.
+    Строки могут быть как объектами моделей, так и словарями .values().
+    """
+    prefix, lookup = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': date})
+            | Q(**{field: date, f'id__{lookup}': pk})
+        )
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(last[field], last['id'])
+    return rows, encode_cursor(getattr(last, field), last.pk)
@@ -0,0 +1,107 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+VERSION_PREFIX = 'version'
+LOOKUP_PREFIX = 'lookup'
+
+
+def version_key(scope):
+    return f'{VERSION_PREFIX}:{scope}'
+
+
+def get_versions(*scopes):
+    """Версии областей данных — время последнего изменения в мс.
+
+    Отсутствующая версия заводится текущим временем, поэтому после очистки
+    кэша старые ETag не совпадут с новыми.
+    """
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {
+        key: int(time.time() * 1000) for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    keys = [version_key(scope) for scope in scopes]
+    now = int(time.time() * 1000)
+    current = cache.get_many(keys)
+    versions = {key: max(now, current.get(key, 0) + 1) for key in keys}
+    cache.set_many(versions, None)
+    return [versions[key] for key in keys]
+
+
+def lookup_key(kind, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return f'{LOOKUP_PREFIX}:{kind}:{digest}'
+
+
+def cached_lookup(kind, value, queryset):
+    """Кэширует id, найденный по slug, username и т.п.
+
+    queryset должен возвращать одно значение через values_list(flat=True).
+    Для несуществующих объектов возвращает None и ничего не кэширует.
+    """
+    key = lookup_key(kind, value)
+    result = cache.get(key)
+    if result is None:
+        result = queryset.first()
+        if result is not None:
+            cache.set(key, result, None)
+    return result
+
+
+def forget_lookup(kind, value):
+    cache.delete(lookup_key(kind, value))
+
+
+def conditional_page(scopes_func):
+    """Отвечает 304, если версии областей страницы не изменились.
+
+    scopes_func получает аргументы представления и возвращает список
+    областей или None, если объект не найден — тогда представление
+    вызывается как обычно. ETag учитывает пользователя и query string,
+    поэтому разные страницы пагинации и разные зрители не смешиваются;
+    область viewer:<id> отвечает за данные в шапке, например счётчик
+    уведомлений. Версии сохраняются в request.page_stamps: по ним
+    page_cache отделяет тело страницы от устаревших копий.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = scopes_func(request, *args, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                scopes = [*scopes, f'viewer:{request.user.pk}']
+            stamps = get_versions(*scopes)
+            request.page_stamps = stamps
+            source = '|'.join((
+                ','.join(map(str, stamps)),
+                str(request.user.pk or 0),
+                request.GET.urlencode(),
+            ))
+            etag = f'"{hashlib.md5(source.encode()).hexdigest()}"'
+            last_modified = max(stamps) // 1000
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(last_modified)
+            response.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
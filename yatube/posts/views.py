@@ -1,69 +1,320 @@
+import os
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.http import (
+    FileResponse, Http404, HttpResponseBadRequest, StreamingHttpResponse
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_POST
 
-from .models import Post, Group, User, Comment, Follow
+from core.jobs import enqueue
+from .archive import SITE_SCOPE, archive_months, period_bounds
+from .models import (
+    Post, Group, User, Comment, Follow, GroupFollow, GroupStats,
+    Notification, Reaction, TrendingPost
+)
 from .forms import PostForm, CommentForm
-from .utils import get_page_context
+from .counters import count_view
+from .feeds import AuthorFeed, GroupFeed, LatestPostsFeed
+from .export import EXPORTS, FORMATS, export_lines, parse_since
+from .graph import follow_graph, followed_authors
+from .notifications import mark_read
+from .pagecache import page_cache
+from .querycache import CachedPaginator, cached_count, get_cached_or_404
+from .reactions import attach_reactions, react
+from .sitemaps import INDEX_NAME, shard_name
+from .suggestions import suggestions_for
+from .threads import comment_page
+from .timeline import merged_feed
+from .utils import get_page_context, keyset_page
+from .versions import cached_lookup, conditional_page
 
 CACHE_TIME = 20
 
 
-@cache_page(CACHE_TIME, cache='default', key_prefix="index_page")
+def schedule_thumbnails(post):
+    if post.image:
+        enqueue(
+            'posts.make_thumbnails',
+            {'post_id': post.pk},
+            dedup_key=f'thumbnails:{post.pk}'
+        )
+
+
+def index_scopes(request):
+    return ['posts']
+
+
+def group_scopes(request, slug):
+    group_id = cached_lookup(
+        'group', slug,
+        Group.objects.filter(slug=slug).values_list('id', flat=True)
+    )
+    if group_id is None:
+        return None
+    scopes = [f'group:{group_id}']
+    if request.user.is_authenticated:
+        scopes.append(f'follow:{request.user.pk}')
+    return scopes
+
+
+def profile_scopes(request, username):
+    author_id = cached_lookup(
+        'user', username,
+        User.objects.filter(username=username).values_list('id', flat=True)
+    )
+    if author_id is None:
+        return None
+    scopes = [f'author:{author_id}']
+    if request.user.is_authenticated:
+        scopes.append(f'follow:{request.user.pk}')
+    return scopes
+
+
+def archive_scopes(request, year, month=None, day=None, slug=None,
+                   username=None):
+    if slug is not None:
+        return group_scopes(request, slug)
+    if username is not None:
+        return profile_scopes(request, username)
+    return index_scopes(request)
+
+
+def home_scopes(request):
+    if not request.user.is_authenticated:
+        return None
+    return ['posts', f'follow:{request.user.pk}']
+
+
+def post_detail_scopes(request, post_id):
+    author_id = cached_lookup(
+        'post-author', post_id,
+        Post.objects.filter(pk=post_id).values_list('author_id', flat=True)
+    )
+    if author_id is None:
+        return None
+    return [f'post:{post_id}', f'author:{author_id}']
+
+
+def comment_replies_scopes(request, post_id, comment_id):
+    return post_detail_scopes(request, post_id)
+
+
+@conditional_page(index_scopes)
+@page_cache(CACHE_TIME, key_prefix="index_page")
 def index(request):
-    posts = Post.objects.all()
-    page_obj = get_page_context(posts, request)
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = get_page_context(posts, request, CachedPaginator)
+    page_obj.object_list = attach_reactions(page_obj.object_list)
     context = {
         'page_obj': page_obj
     }
     return render(request, 'posts/index.html', context)
 
 
+latest_feed = conditional_page(index_scopes)(
+    page_cache(CACHE_TIME, key_prefix='feed')(LatestPostsFeed())
+)
+
+
+def trending_scopes(request, slug=None):
+    return ['trending']
+
+
+@conditional_page(trending_scopes)
+def trending(request, slug=None):
+    group = None
+    if slug is not None:
+        group = get_cached_or_404(Group, slug=slug)
+    entries = TrendingPost.objects.filter(group=group).select_related(
+        'post__author', 'post__group'
+    )
+    context = {
+        'group': group,
+        'entries': entries,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index_scopes(request):
+    return ['groups']
+
+
+@conditional_page(group_index_scopes)
+def group_index(request):
+    stats = GroupStats.objects.select_related('group').order_by(
+        '-last_post', 'group_id'
+    )
+    context = {
+        'page_obj': get_page_context(stats, request)
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@conditional_page(archive_scopes)
+def archive(request, year, month=None, day=None, slug=None, username=None):
+    try:
+        start, end = period_bounds(year, month, day)
+    except ValueError:
+        raise Http404
+    posts = Post.objects.filter(
+        pub_date__gte=start, pub_date__lt=end
+    ).select_related('author', 'group')
+    group = author = None
+    scope, url_name, owner = SITE_SCOPE, 'archive', {}
+    if slug is not None:
+        group = get_cached_or_404(Group, slug=slug)
+        posts = posts.filter(group=group)
+        scope, url_name, owner = f'group:{group.pk}', 'group_archive', {
+            'slug': slug
+        }
+    elif username is not None:
+        author = get_cached_or_404(User, username=username)
+        posts = posts.filter(author=author)
+        scope, url_name, owner = f'author:{author.pk}', 'profile_archive', {
+            'username': username
+        }
+    try:
+        posts, next_cursor = keyset_page(
+            posts, 'pub_date', request.GET.get('cursor')
+        )
+    except ValueError:
+        raise Http404
+    months = archive_months(scope)
+    for row in months:
+        row.url = reverse(f'posts:{url_name}', kwargs={
+            **owner, 'year': row.month.year, 'month': row.month.month
+        })
+    context = {
+        'group': group,
+        'author': author,
+        'period': start.date(),
+        'period_kind': 'day' if day else 'month' if month else 'year',
+        'posts': attach_reactions(posts),
+        'next_cursor': next_cursor,
+        'months': months,
+    }
+    return render(request, 'posts/archive.html', context)
+
+
+group_feed = conditional_page(group_scopes)(
+    page_cache(CACHE_TIME, key_prefix='feed')(GroupFeed())
+)
+
+
+@conditional_page(group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = get_page_context(posts, request)
+    group = get_cached_or_404(Group, slug=slug)
+    posts = group.posts.select_related('author')
+    page_obj = get_page_context(posts, request, CachedPaginator)
+    page_obj.object_list = attach_reactions(page_obj.object_list)
+    following = request.user.is_authenticated and GroupFollow.objects.filter(
+        user=request.user, group=group
+    ).exists()
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'following': following,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    posts_count = posts.count()
-    page_obj = get_page_context(posts, request)
+    author = get_cached_or_404(User, username=username)
+    posts = Post.objects.filter(author=author).select_related('group')
+    posts_count = cached_count(posts)
+    page_obj = get_page_context(posts, request, CachedPaginator)
+    page_obj.object_list = attach_reactions(page_obj.object_list)
+    graph = follow_graph()
     following = False
+    suggestions = []
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
+        following = graph.is_following(request.user.pk, author.pk)
+        suggestions = suggestions_for(request.user)
     context = {
         'author': author,
         'page_obj': page_obj,
         'posts_count': posts_count,
-        'following': following
+        'following': following,
+        'followers_count': graph.followers_count(author.pk),
+        'following_count': graph.following_count(author.pk),
+        'suggestions': suggestions,
     }
     return render(request, 'posts/profile.html', context)
 
 
+profile_feed = conditional_page(profile_scopes)(
+    page_cache(CACHE_TIME, key_prefix='feed')(AuthorFeed())
+)
+
+
+@conditional_page(post_detail_scopes)
 def post_detail(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
+    count_view(post.pk)
+    attach_reactions([post])
     post_count = post.author.posts.count()
     form = CommentForm()
-    comments = Comment.objects.filter(post=post)
+    my_reaction = None
+    if request.user.is_authenticated:
+        my_reaction = Reaction.objects.filter(
+            user=request.user, post=post
+        ).values_list('kind', flat=True).first()
+    comments, next_cursor = comment_page(post.pk)
+    reply_to = request.GET.get('reply_to')
+    if reply_to:
+        reply_to = Comment.objects.filter(
+            post=post, pk=reply_to if reply_to.isdigit() else None
+        ).select_related('author').first()
     context = {
         'post': post,
         'post_count': post_count,
         'comments': comments,
+        'next_cursor': next_cursor,
+        'more_url': reverse('posts:comments', args=(post.pk,)),
+        'more_depth': 0,
+        'reply_to': reply_to,
+        'my_reaction': my_reaction,
         'form': form
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def render_comments(request, post_id, parent=None):
+    try:
+        comments, next_cursor = comment_page(
+            post_id, parent, request.GET.get('cursor')
+        )
+    except ValueError:
+        raise Http404
+    context = {
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'more_url': request.path,
+        'more_depth': parent.depth + 1 if parent else 0,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@conditional_page(post_detail_scopes)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return render_comments(request, post_id)
+
+
+@conditional_page(comment_replies_scopes)
+def comment_replies(request, post_id, comment_id):
+    comment = get_object_or_404(Comment, pk=comment_id, post_id=post_id)
+    return render_comments(request, post_id, comment)
+
+
 @login_required
 def post_create(request):
     if request.method == "POST":
@@ -72,6 +323,7 @@ def post_create(request):
             new_post = form.save(commit=False)
             new_post.author = request.user
             new_post.save()
+            schedule_thumbnails(new_post)
             return redirect('posts:profile', username=request.user)
     else:
         form = PostForm()
@@ -94,6 +346,8 @@ def post_edit(request, post_id):
         )
         if form.is_valid():
             form.save()
+            if 'image' in form.changed_data:
+                schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id=post.id)
     context = {
         'form': form,
@@ -110,22 +364,89 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent')
+        if parent_id:
+            comment.parent = get_object_or_404(
+                Comment,
+                pk=parent_id if parent_id.isdigit() else None,
+                post=post
+            )
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+@require_POST
+def post_react(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    kind = request.POST.get('kind')
+    if kind not in dict(Reaction.KINDS):
+        return HttpResponseBadRequest('Неизвестная реакция')
+    react(request.user.pk, post.pk, kind)
+    return redirect('posts:post_detail', post_id=post.pk)
+
+
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(
-        author__following__user=request.user)
+        author_id__in=followed_authors(request.user.pk))
     page_obj = get_page_context(posts, request)
-    context = {'page_obj': page_obj}
+    page_obj.object_list = attach_reactions(page_obj.object_list)
+    context = {
+        'page_obj': page_obj,
+        'suggestions': suggestions_for(request.user),
+    }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+@conditional_page(home_scopes)
+def home(request):
+    try:
+        posts, next_cursor = merged_feed(
+            request.user.pk, request.GET.get('cursor')
+        )
+    except ValueError:
+        raise Http404
+    context = {
+        'posts': attach_reactions(posts),
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/home.html', context)
+
+
+def follow_list(request, username, followers):
+    author = get_cached_or_404(User, username=username)
+    graph = follow_graph()
+    if followers:
+        user_ids = graph.followers_of(author.pk)
+    else:
+        user_ids = graph.following_of(author.pk)
+    page_obj = get_page_context(user_ids, request)
+    users = User.objects.in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        users[user_id] for user_id in page_obj.object_list
+        if user_id in users
+    ]
+    context = {
+        'author': author,
+        'page_obj': page_obj,
+        'followers': followers,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def profile_followers(request, username):
+    return follow_list(request, username, followers=True)
+
+
+def profile_following(request, username):
+    return follow_list(request, username, followers=False)
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_cached_or_404(User, username=username)
     user = request.user
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
@@ -141,3 +462,91 @@ def profile_unfollow(request, username):
     )
     user_follower.delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_cached_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_posts', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    GroupFollow.objects.filter(
+        user=request.user, group__slug=slug
+    ).delete()
+    return redirect('posts:group_posts', slug=slug)
+
+
+@staff_member_required
+def export(request, name):
+    if name not in EXPORTS:
+        raise Http404
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    try:
+        since = parse_since(name, request.GET.get('since'))
+    except ValueError:
+        return HttpResponseBadRequest('Некорректная отметка since')
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(
+        export_lines(name, fmt, since),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+def sitemap(request, number=None):
+    """Отдаёт готовый файл карты сайта, собранный build_sitemaps.
+
+    База данных не читается: ETag и Last-Modified берутся из размера
+    и даты изменения файла, поэтому повторный обход получает 304.
+    Метаданные читаются с уже открытого файла: если сборка подменит
+    его через os.replace, ответ и ETag всё равно относятся к одной
+    версии.
+    """
+    name = INDEX_NAME if number is None else shard_name(number)
+    path = os.path.join(settings.SITEMAP_ROOT, name)
+    try:
+        sitemap_file = open(path, 'rb')
+    except FileNotFoundError:
+        raise Http404
+    stat = os.fstat(sitemap_file.fileno())
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = FileResponse(sitemap_file, content_type='application/xml')
+    else:
+        sitemap_file.close()
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@login_required
+def notifications(request):
+    try:
+        notifications, cursor = keyset_page(
+            Notification.objects.filter(user=request.user).select_related(
+                'actor', 'post'
+            ),
+            'created',
+            request.GET.get('cursor'),
+        )
+    except ValueError:
+        raise Http404
+    mark_read(
+        request.user.pk,
+        [item.pk for item in notifications if not item.is_read]
+    )
+    context = {
+        'notifications': notifications,
+        'next_cursor': cursor,
+    }
+    return render(request, 'posts/notifications.html', context)
@@ -0,0 +1,160 @@
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.models import Count
+from django.urls import reverse
+
+from .models import GroupStats, Post, User
+from .tasks import make_thumbnails
+from .utils import POSTS_PER_PAGE
+
+WARM_PAGES: int = 3
+WARM_GROUPS: int = 10
+WARM_AUTHORS: int = 10
+WARM_WORKERS: int = 4
+
+logger = logging.getLogger(__name__)
+
+
+def warmup_urls(pages=WARM_PAGES, groups=WARM_GROUPS, authors=WARM_AUTHORS):
+    """Адреса для прогрева.
+
+    Первые страницы главной, группы с самыми активными авторами и
+    авторы с наибольшим числом подписчиков.
+    """
+    index = reverse('posts:main')
+    urls = [index] + [f'{index}?page={page}' for page in range(2, pages + 1)]
+    slugs = GroupStats.objects.filter(posts_count__gt=0).order_by(
+        '-active_authors', '-posts_count'
+    ).values_list('group__slug', flat=True)[:groups]
+    urls += [reverse('posts:group_posts', args=(slug,)) for slug in slugs]
+    usernames = User.objects.annotate(
+        followers=Count('following')
+    ).filter(followers__gt=0).order_by('-followers', 'pk').values_list(
+        'username', flat=True
+    )[:authors]
+    urls += [reverse('posts:profile', args=(name,)) for name in usernames]
+    return urls
+
+
+def build_environ(url):
+    """WSGI-окружение анонимного GET-запроса к url на хосте SITE_URL.
+
+    Ключи кэша страниц зависят от хоста, поэтому прогреваются те же
+    ключи, что попадут в настоящие запросы.
+    """
+    site = urlsplit(settings.SITE_URL)
+    port = site.port or (443 if site.scheme == 'https' else 80)
+    path, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': site.hostname,
+        'SERVER_PORT': str(port),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': site.netloc,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': site.scheme,
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def warm_url(application, url):
+    """Рендерит страницу через весь стек middleware.
+
+    Исключения представлений WSGIHandler превращает в ответ 500, а
+    любые другие ошибки логируются: страница считается неудачной, но
+    прогрев остальных продолжается.
+    """
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    try:
+        result = application(build_environ(url), start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            result.close()
+    except Exception:
+        logger.exception('Не удалось прогреть %s', url)
+        return False
+    if statuses != [200]:
+        logger.warning('Прогрев %s: ответ %s', url, statuses)
+    return statuses == [200]
+
+
+def warm_thumbnails(post_id):
+    try:
+        make_thumbnails(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+        return False
+    return True
+
+
+def in_worker(func):
+    """Закрывает соединения с базой, открытые потоком пула."""
+    def run(argument):
+        try:
+            return func(argument)
+        finally:
+            connections.close_all()
+    return run
+
+
+def warm_cache(pages=WARM_PAGES, groups=WARM_GROUPS, authors=WARM_AUTHORS,
+               workers=WARM_WORKERS):
+    """Заполняет кэши до того, как экземпляр начнёт принимать запросы.
+
+    Страницы и миниатюры последних постов с картинками рендерятся пулом
+    из workers потоков, при workers=1 — в текущем потоке. Возвращает
+    число прогретых страниц, число страниц с ошибкой и число постов
+    с построенными миниатюрами.
+    """
+    urls = warmup_urls(pages, groups, authors)
+    post_ids = list(
+        Post.objects.exclude(image='').exclude(image=None).values_list(
+            'pk', flat=True
+        )[:pages * POSTS_PER_PAGE]
+    )
+    render = partial(warm_url, WSGIHandler())
+    if workers <= 1:
+        pages_ok = [render(url) for url in urls]
+        thumbnails = [warm_thumbnails(pk) for pk in post_ids]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages_ok = list(pool.map(in_worker(render), urls))
+            thumbnails = list(
+                pool.map(in_worker(warm_thumbnails), post_ids)
+            )
+    warmed = sum(pages_ok)
+    return warmed, len(pages_ok) - warmed, sum(thumbnails)
+
+
+def warm_on_startup():
+    """Прогрев из wsgi.py: ошибка прогрева не должна мешать запуску."""
+    try:
+        warmed, failed, thumbnails = warm_cache()
+    except Exception:
+        logger.exception('Прогрев кэша при запуске не удался')
+        return
+    logger.info(
+        'Прогрето страниц: %s, с ошибкой: %s, миниатюр: %s',
+        warmed, failed, thumbnails
+    )
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+User = get_user_model()
+
+USER_CACHE_TIMEOUT: int = 5 * 60
+USER_PREFIX = 'session-user'
+
+
+def user_key(user_id):
+    return f'{USER_PREFIX}:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, загружающий пользователя сессии из кэша.
+
+    AuthenticationMiddleware вызывает get_user на каждый запрос;
+    с кэшем запрос к auth_user остаётся только при промахе. Запись
+    своя у каждого пользователя и сбрасывается сигналами при его
+    сохранении, удалении и входе, так что вход или правка одного
+    пользователя не трогает записи остальных. Изменения в обход
+    сигналов, например update(), действуют не позже чем через
+    USER_CACHE_TIMEOUT или сразу после forget_user.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = User._default_manager.filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        if self.user_can_authenticate(user):
+            return user
+        return None
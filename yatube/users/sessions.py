@@ -0,0 +1,31 @@
+import hashlib
+
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    """cached_db, который не пишет в базу неизменённую сессию.
+
+    Сессия читается из кэша, база — только при промахе. SessionMiddleware
+    сохраняет сессию, как только её пометили изменённой, даже если
+    данные остались прежними; здесь сохранение пропускается, пока
+    отпечаток данных совпадает с прочитанным.
+    """
+
+    def fingerprint(self, data):
+        return hashlib.md5(self.serializer().dumps(data)).hexdigest()
+
+    def load(self):
+        data = super().load()
+        self.loaded_fingerprint = self.fingerprint(data)
+        return data
+
+    def save(self, must_create=False):
+        fingerprint = self.fingerprint(self._session)
+        if (
+            not must_create and self.session_key is not None
+            and fingerprint == getattr(self, 'loaded_fingerprint', None)
+        ):
+            return
+        super().save(must_create)
+        self.loaded_fingerprint = fingerprint
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..backends import forget_user
+from ..sessions import SessionStore
+
+User = get_user_model()
+
+
+class CachedAuthTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def auth_queries(self):
+        self.client.get(reverse('about:author'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('about:author'))
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if 'django_session' in query['sql'] or 'auth_user' in query['sql']
+        ]
+
+    def test_request_without_session_and_user_queries(self):
+        """Сессия и пользователь берутся из кэша"""
+        response, queries = self.auth_queries()
+        self.assertEqual(queries, [])
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+    def test_user_change_invalidates(self):
+        """Изменение пользователя сбрасывает его запись в кэше"""
+        self.auth_queries()
+        self.user.first_name = 'Имя'
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user.first_name, 'Имя')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        forget_user(self.user.pk)
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_other_login_keeps_cached_user(self):
+        """Вход другого пользователя не сбрасывает запись в кэше"""
+        self.auth_queries()
+        Client().force_login(User.objects.create_user(username='other'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'auth_user' in query['sql']
+        ])
+
+    def test_sessions_of_model_backend_still_valid(self):
+        """Сессии, созданные до включения кэша, остаются действительными"""
+        client = Client()
+        client.force_login(
+            self.user, 'django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+
+class LazySessionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['value'] = 1
+        session.save()
+        self.key = session.session_key
+
+    def test_unchanged_session_not_written(self):
+        """Неизменённая сессия не пишется ни в базу, ни в кэш"""
+        session = SessionStore(self.key)
+        with self.assertNumQueries(0):
+            session['value'] = 1
+            session.save()
+
+    def test_changed_session_written_through(self):
+        """Изменённая сессия сохраняется в базу и читается из кэша"""
+        session = SessionStore(self.key)
+        session['value'] = 2
+        session.save()
+        self.assertEqual(
+            Session.objects.get(session_key=self.key).get_decoded(),
+            {'value': 2}
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.key)['value'], 2)
+        cache.clear()
+        self.assertEqual(SessionStore(self.key)['value'], 2)
@@ -0,0 +1,5 @@
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES
+
+# Пустой LOCATION — свой временный файл кэша на каждый запуск тестов.
+CACHES = {'default': {**CACHES['default'], 'LOCATION': ''}}